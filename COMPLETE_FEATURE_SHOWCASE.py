@@ -4,33 +4,384 @@ Complete Feature Showcase
 Demonstrates: Camera movements, animations, motion graphics, modeling, shading, and all new features
 """
 
+import array
+import glob
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
 import bpy
-import math
-from mathutils import Vector
+from math import pi, tau
+import numpy as np
+from mathutils import Euler, Matrix
+
+try:
+    from numba import njit
+except ImportError:  # numba is not bundled with Blender; run as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Principled BSDF inputs used by the showcase, resolved by name once per node.
+# Each logical name maps to its candidate socket names (Blender 3.x, then 4.x).
+_BSDF_SOCKETS = {
+    "Base Color": ("Base Color",),
+    "Metallic": ("Metallic",),
+    "Roughness": ("Roughness",),
+    "Transmission": ("Transmission", "Transmission Weight"),
+    "Transmission Roughness": ("Transmission Roughness",),
+    "Emission": ("Emission", "Emission Color"),
+    "Emission Strength": ("Emission Strength",),
+}
+
+# Raw enum values for bulk keyframe writes via foreach_set
+_INTERP_LINEAR = 1
+_INTERP_BEZIER = 2
+_INTERP_SINE = 12
+_EASING_IN_OUT = 3
+_HANDLE_FREE = 0
+
+def _bsdf_sockets(principled):
+    """Resolve the showcase's Principled BSDF inputs into a name -> socket dict
+    
+    Logical names are matched against each Blender version's socket names;
+    inputs that don't exist at all (e.g. Transmission Roughness on 4.x) are
+    left out, so callers set version-dependent ones through _set_socket().
+    """
+    inputs = principled.inputs
+    sockets = {}
+    for name, candidates in _BSDF_SOCKETS.items():
+        for candidate in candidates:
+            if candidate in inputs:
+                sockets[name] = inputs[candidate]
+                break
+    return sockets
+
+def _set_socket(sockets, name, value):
+    """Set a resolved socket's default value, skipping inputs this Blender lacks"""
+    socket = sockets.get(name)
+    if socket is not None:
+        socket.default_value = value
+
+_TEMPLATE_MATERIAL = "Showcase_Template_Material"
+
+def _apply_bezier_handles(fcurves):
+    """Write precomputed Bezier handles onto F-Curves with FREE handle types"""
+    for fcurve in fcurves:
+        points = fcurve.keyframe_points
+        co = np.empty(len(points) * 2, dtype=np.float32)
+        points.foreach_get("co", co)
+        co = co.reshape(-1, 2).astype(np.float64)
+        handle_left, handle_right = compute_bezier_handles(co[:, 0].copy(), co[:, 1].copy())
+        points.foreach_set("handle_left", handle_left.astype(np.float32).ravel())
+        points.foreach_set("handle_right", handle_right.astype(np.float32).ravel())
+
+def _material_from_template(name):
+    """Create a material by copying the shared Principled BSDF template
+    
+    The template (Principled BSDF -> Material Output) is built once per scene
+    and duplicated with a single node-tree copy for every showcase material.
+    """
+    template = bpy.data.materials.get(_TEMPLATE_MATERIAL)
+    if template is None:
+        template = bpy.data.materials.new(name=_TEMPLATE_MATERIAL)
+        template.use_nodes = True
+    material = template.copy()
+    material.name = name
+    return material
+
+def _keyframe_channels(obj, data_path, frames, values):
+    """Author keyframes for every component of a vector property in one pass
+    
+    Builds the F-Curves directly on the object's action and bulk-writes the
+    key coordinates, instead of calling keyframe_insert once per frame.
+    
+    Args:
+        obj: Object to animate
+        data_path: Vector property to key (e.g. "location")
+        frames: Frame numbers, one per key
+        values: Property values, one tuple per frame
+    
+    Returns:
+        List of created F-Curves, one per component
+    """
+    anim = obj.animation_data or obj.animation_data_create()
+    if anim.action is None:
+        anim.action = bpy.data.actions.new(name=f"{obj.name}Action")
+    
+    fcurves = []
+    for index in range(len(values[0])):
+        fcurve = anim.action.fcurves.new(data_path=data_path, index=index)
+        fcurve.keyframe_points.add(len(frames))
+        co = []
+        for frame, value in zip(frames, values):
+            co.extend((frame, value[index]))
+        fcurve.keyframe_points.foreach_set("co", co)
+        fcurve.update()
+        fcurves.append(fcurve)
+    return fcurves
+
+def _set_interpolation(fcurves, interpolation, easing=None, handle_type=None):
+    """Bulk-set keyframe interpolation (and optionally easing/handles) on F-Curves
+    
+    Args:
+        fcurves: F-Curves to update
+        interpolation: Raw interpolation enum value (see _INTERP_*)
+        easing: Optional raw easing enum value
+        handle_type: Optional raw handle type applied to both handles
+    """
+    for fcurve in fcurves:
+        points = fcurve.keyframe_points
+        n = len(points)
+        points.foreach_set("interpolation", array.array('i', [interpolation]) * n)
+        if easing is not None:
+            points.foreach_set("easing", array.array('i', [easing]) * n)
+        if handle_type is not None:
+            handles = array.array('i', [handle_type]) * n
+            points.foreach_set("handle_left_type", handles)
+            points.foreach_set("handle_right_type", handles)
+        fcurve.update()
+
+@njit(cache=True, fastmath=True)
+def compute_bezier_handles(frames, values):
+    """Compute smooth Bezier handles for a sorted run of keyframes
+    
+    Interior keys get a tangent through their neighbours (Catmull-Rom style,
+    like Blender's AUTO handles); the first and last keys get flat tangents.
+    Each handle reaches a third of the way towards the neighbouring key.
+    
+    Args:
+        frames: float64 array of key frames
+        values: float64 array of key values
+    
+    Returns:
+        (handle_left, handle_right) arrays of shape (n, 2)
+    """
+    n = frames.shape[0]
+    handle_left = np.empty((n, 2))
+    handle_right = np.empty((n, 2))
+    for i in range(n):
+        prev = max(i - 1, 0)
+        nxt = min(i + 1, n - 1)
+        slope = 0.0
+        if 0 < i < n - 1:
+            slope = (values[nxt] - values[prev]) / (frames[nxt] - frames[prev])
+        dl = (frames[i] - frames[prev]) / 3.0
+        dr = (frames[nxt] - frames[i]) / 3.0
+        handle_left[i, 0] = frames[i] - dl
+        handle_left[i, 1] = values[i] - slope * dl
+        handle_right[i, 0] = frames[i] + dr
+        handle_right[i, 1] = values[i] + slope * dr
+    return handle_left, handle_right
+
+def _cube_geometry(size=2.0):
+    """Vertices and quad faces of an axis-aligned cube centred on the origin"""
+    h = size / 2.0
+    verts = np.array([
+        (-h, -h, -h), (-h, h, -h), (h, h, -h), (h, -h, -h),
+        (-h, -h, h), (-h, h, h), (h, h, h), (h, -h, h),
+    ])
+    faces = np.array([
+        (0, 1, 2, 3), (4, 7, 6, 5), (0, 4, 5, 1),
+        (1, 5, 6, 2), (2, 6, 7, 3), (3, 7, 4, 0),
+    ])
+    return verts, faces
+
+def _uv_sphere_geometry(radius, segments=32, rings=16):
+    """Vertices and faces of a UV sphere (quads with triangle fans at the poles)"""
+    theta = np.linspace(0.0, pi, rings + 1)[1:-1]
+    phi = np.linspace(0.0, tau, segments, endpoint=False)
+    sin_t = np.sin(theta)[:, None]
+    ring_verts = np.stack((
+        sin_t * np.cos(phi),
+        sin_t * np.sin(phi),
+        np.repeat(np.cos(theta)[:, None], segments, axis=1),
+    ), axis=-1).reshape(-1, 3)
+    verts = np.vstack(((0.0, 0.0, 1.0), ring_verts, (0.0, 0.0, -1.0))) * radius
+    
+    bottom = len(verts) - 1
+    seg = np.arange(segments)
+    nxt = (seg + 1) % segments
+    faces = [(0, 1 + j, 1 + k) for j, k in zip(seg, nxt)]
+    for ring in range(rings - 2):
+        a = 1 + ring * segments
+        b = a + segments
+        faces.extend(zip(a + seg, b + seg, b + nxt, a + nxt))
+    last = 1 + (rings - 2) * segments
+    faces.extend((last + k, last + j, bottom) for j, k in zip(seg, nxt))
+    return verts, faces
+
+def _torus_geometry(major_radius, minor_radius, major_segments=48, minor_segments=12):
+    """Vertices and quad faces of a torus around the Z axis"""
+    u = np.linspace(0.0, tau, major_segments, endpoint=False)[:, None]
+    v = np.linspace(0.0, tau, minor_segments, endpoint=False)[None, :]
+    ring = major_radius + minor_radius * np.cos(v)
+    verts = np.stack((
+        ring * np.cos(u),
+        ring * np.sin(u),
+        np.repeat(minor_radius * np.sin(v), major_segments, axis=0),
+    ), axis=-1).reshape(-1, 3)
+    
+    i = np.arange(major_segments)[:, None]
+    j = np.arange(minor_segments)[None, :]
+    i2 = (i + 1) % major_segments
+    j2 = (j + 1) % minor_segments
+    faces = np.stack((
+        i * minor_segments + j,
+        i2 * minor_segments + j,
+        i2 * minor_segments + j2,
+        i * minor_segments + j2,
+    ), axis=-1).reshape(-1, 4)
+    return verts, faces
+
+def _link_object(name, data, location=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
+    """Create an object for existing data and link it into the scene collection
+    
+    Objects are created through bpy.data rather than the *_add operators, so no
+    selection/active-object state or undo steps are involved. The transform is
+    composed into one world matrix and written in a single assignment.
+    """
+    obj = bpy.data.objects.new(name, data)
+    obj.matrix_world = Matrix.LocRotScale(location, Euler(rotation), scale)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+def _mesh_object(name, verts, faces, location=(0, 0, 0), scale=(1, 1, 1)):
+    """Create a mesh object from raw geometry without going through bpy.ops
+    
+    from_pydata() tests ``if edges or faces``, which is ambiguous for NumPy
+    arrays, so array geometry is handed over as plain lists.
+    """
+    mesh = bpy.data.meshes.new(name)
+    if isinstance(verts, np.ndarray):
+        verts = verts.tolist()
+    if isinstance(faces, np.ndarray):
+        faces = faces.tolist()
+    mesh.from_pydata(verts, [], faces)
+    mesh.update()
+    return _link_object(name, mesh, location=location, scale=scale)
+
+def _point_cloud_object(name, points, location=(0, 0, 0)):
+    """Create a vertex-only mesh object, uploading all points in one foreach_set"""
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(points))
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(points, dtype=np.float32).ravel())
+    mesh.update()
+    return _link_object(name, mesh, location=location)
+
+def _text_object(name, body, size, location):
+    """Create a centred text object"""
+    curve = bpy.data.curves.new(name, type='FONT')
+    curve.body = body
+    curve.size = size
+    curve.align_x = 'CENTER'
+    return _link_object(name, curve, location=location)
+
+# Cycles compute backends in order of preference
+_GPU_BACKENDS = ('OPTIX', 'CUDA', 'HIP', 'ONEAPI', 'METAL')
+
+def _enable_gpu_cycles(scene):
+    """Switch the scene to Cycles on the first GPU backend that has a device
+    
+    Returns:
+        Name of the selected backend, or None if no GPU device is available
+    """
+    addon = bpy.context.preferences.addons.get('cycles')
+    if addon is None:
+        return None
+    prefs = addon.preferences
+    
+    for backend in _GPU_BACKENDS:
+        try:
+            prefs.compute_device_type = backend
+        except TypeError:
+            continue  # Backend not compiled into this Blender build
+        gpus = [d for d in prefs.get_devices_for_type(backend) if d.type != 'CPU']
+        if gpus:
+            break
+    else:
+        prefs.compute_device_type = 'NONE'
+        return None
+    
+    for device in gpus:
+        device.use = True
+    scene.render.engine = 'CYCLES'
+    scene.cycles.device = 'GPU'
+    return backend
+
+@contextmanager
+def defer_depsgraph():
+    """Hold back depsgraph update handlers during bulk scene authoring
+    
+    Handlers registered on depsgraph_update_pre are detached for the duration
+    of the block and the view layer is evaluated once at the end, instead of
+    reacting to every intermediate edit.
+    """
+    handlers = bpy.app.handlers.depsgraph_update_pre
+    saved = list(handlers)
+    handlers.clear()
+    try:
+        yield
+    finally:
+        handlers.extend(saved)
+        bpy.context.view_layer.update()
+
+# Objects created by the showcase, by role, so later steps index them directly
+# instead of scanning bpy.data.objects
+CREATED = {'mesh': [], 'text': [], 'camera': [], 'light': []}
+
+# Render outputs: a video directly, or a PNG sequence for hardware encoding
+_VIDEO_OUTPUT = "//renders/complete_showcase.mp4"
+_FRAME_OUTPUT = "//renders/frames/frame_####"
+
+# ffmpeg hardware H.264 encoders for Cycles GPU backends with a video engine
+_HW_ENCODERS = {'OPTIX': 'h264_nvenc', 'CUDA': 'h264_nvenc'}
+
+def _hardware_encoder(scene):
+    """ffmpeg encoder for the GPU the scene renders on, or None for CPU encoding"""
+    if scene.render.engine != 'CYCLES' or scene.cycles.device != 'GPU':
+        return None
+    prefs = bpy.context.preferences.addons['cycles'].preferences
+    return _HW_ENCODERS.get(prefs.compute_device_type)
 
 def clear_scene():
     """Start with clean scene"""
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
+    # Remove objects through bpy.data to skip operator dispatch and undo pushes
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    
+    # Drop the data-blocks left behind by the removed objects
+    if bpy.app.version >= (3, 2, 0):
+        bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+    else:
+        for datablocks in (bpy.data.meshes, bpy.data.materials, bpy.data.actions):
+            for block in list(datablocks):
+                datablocks.remove(block)
+    for created in CREATED.values():
+        created.clear()
     print("[OK] Scene cleared")
 
 def setup_scene():
     """Setup basic scene"""
     # Add world lighting
-    world = bpy.context.scene.world
+    scene = bpy.context.scene
+    world = scene.world
     world.use_nodes = True
     bg = world.node_tree.nodes['Background']
     bg.inputs[0].default_value = (0.1, 0.1, 0.15, 1.0)  # Dark blue
     
     # Add basic lighting
-    bpy.ops.object.light_add(type='SUN', location=(5, 5, 10))
-    sun = bpy.context.active_object
-    sun.data.energy = 3.0
+    sun_light = bpy.data.lights.new("Sun", type='SUN')
+    sun_light.energy = 3.0
+    CREATED['light'].append(_link_object("Sun", sun_light, location=(5, 5, 10)))
     
-    bpy.ops.object.light_add(type='AREA', location=(-5, -5, 5))
-    area = bpy.context.active_object
-    area.data.energy = 50.0
-    area.data.size = 5.0
+    area_light = bpy.data.lights.new("Area", type='AREA')
+    area_light.energy = 50.0
+    area_light.size = 5.0
+    CREATED['light'].append(_link_object("Area", area_light, location=(-5, -5, 5)))
     
     print("[OK] Scene setup complete")
 
@@ -41,18 +392,16 @@ def showcase_modeling():
     print("=" * 70)
     
     # Create modern geometric shapes
-    bpy.ops.mesh.primitive_cube_add(location=(-4, 0, 0), scale=(1, 1, 2))
-    cube = bpy.context.active_object
-    cube.name = "Modern_Cube"
+    cube = _mesh_object("Modern_Cube", *_cube_geometry(),
+                        location=(-4, 0, 0), scale=(1, 1, 2))
     
     # Add subdivision surface
     mod = cube.modifiers.new(name="Subdivision", type='SUBSURF')
     mod.levels = 2
     
     # Create sphere with bevel
-    bpy.ops.mesh.primitive_uv_sphere_add(location=(0, 0, 0), radius=1.5)
-    sphere = bpy.context.active_object
-    sphere.name = "Beveled_Sphere"
+    sphere = _mesh_object("Beveled_Sphere", *_uv_sphere_geometry(1.5),
+                          location=(0, 0, 0))
     
     # Add bevel modifier
     bevel = sphere.modifiers.new(name="Bevel", type='BEVEL')
@@ -60,9 +409,8 @@ def showcase_modeling():
     bevel.segments = 3
     
     # Create torus with array
-    bpy.ops.mesh.primitive_torus_add(location=(4, 0, 0), major_radius=1, minor_radius=0.3)
-    torus = bpy.context.active_object
-    torus.name = "Array_Torus"
+    torus = _mesh_object("Array_Torus", *_torus_geometry(1, 0.3),
+                         location=(4, 0, 0))
     
     # Add array modifier
     array = torus.modifiers.new(name="Array", type='ARRAY')
@@ -70,29 +418,26 @@ def showcase_modeling():
     array.relative_offset_displace = (1.5, 0, 0)
     
     print("[OK] Modeling showcase: Created geometric shapes with modifiers")
+    CREATED['mesh'].extend((cube, sphere, torus))
     return [cube, sphere, torus]
 
-def showcase_shading():
-    """Demonstrate shading and materials"""
+def showcase_shading(objects):
+    """Demonstrate shading and materials
+    
+    Args:
+        objects: Mesh objects returned by showcase_modeling (cube, sphere, torus)
+    """
     print("\n" + "=" * 70)
     print("SHADING SHOWCASE")
     print("=" * 70)
     
-    # Create materials for each object
-    objects = [obj for obj in bpy.data.objects if obj.type == 'MESH']
-    
     # Material 1: Holographic (for cube)
-    mat1 = bpy.data.materials.new(name="Holographic_Material")
-    mat1.use_nodes = True
+    mat1 = _material_from_template("Holographic_Material")
     nodes = mat1.node_tree.nodes
     links = mat1.node_tree.links
     
-    # Clear default nodes
-    nodes.clear()
-    
-    # Add nodes
-    output = nodes.new(type='ShaderNodeOutputMaterial')
-    principled = nodes.new(type='ShaderNodeBsdfPrincipled')
+    # Extend the template's Principled BSDF with a noise-driven color ramp
+    principled = nodes['Principled BSDF']
     noise = nodes.new(type='ShaderNodeTexNoise')
     colorramp = nodes.new(type='ShaderNodeValToRGB')
     
@@ -101,44 +446,44 @@ def showcase_shading():
     colorramp.color_ramp.elements[0].color = (0.2, 0.5, 1.0, 1.0)  # Blue
     colorramp.color_ramp.elements[1].color = (1.0, 0.3, 0.8, 1.0)  # Pink
     
-    principled.inputs[0].default_value = (0.5, 0.7, 1.0, 1.0)  # Base color
-    principled.inputs[6].default_value = 0.0  # Metallic
-    principled.inputs[7].default_value = 0.9  # Roughness
-    principled.inputs[9].default_value = 0.5  # Transmission
-    principled.inputs[15].default_value = 1.0  # Transmission roughness
+    sockets = _bsdf_sockets(principled)
+    sockets["Base Color"].default_value = (0.5, 0.7, 1.0, 1.0)
+    sockets["Metallic"].default_value = 0.0
+    sockets["Roughness"].default_value = 0.9
+    _set_socket(sockets, "Transmission", 0.5)
+    _set_socket(sockets, "Transmission Roughness", 1.0)
     
     # Connect nodes
     links.new(noise.outputs[0], colorramp.inputs[0])
-    links.new(colorramp.outputs[0], principled.inputs[0])
-    links.new(principled.outputs[0], output.inputs[0])
+    links.new(colorramp.outputs[0], sockets["Base Color"])
     
     if objects:
         objects[0].data.materials.append(mat1)
         print(f"[OK] Applied holographic material to {objects[0].name}")
     
     # Material 2: Glossy (for sphere)
-    mat2 = bpy.data.materials.new(name="Glossy_Material")
-    mat2.use_nodes = True
+    mat2 = _material_from_template("Glossy_Material")
     nodes2 = mat2.node_tree.nodes
     principled2 = nodes2.get('Principled BSDF')
     if principled2:
-        principled2.inputs[0].default_value = (0.2, 0.8, 0.4, 1.0)  # Green
-        principled2.inputs[6].default_value = 0.8  # Metallic
-        principled2.inputs[7].default_value = 0.1  # Roughness
+        sockets2 = _bsdf_sockets(principled2)
+        sockets2["Base Color"].default_value = (0.2, 0.8, 0.4, 1.0)  # Green
+        sockets2["Metallic"].default_value = 0.8
+        sockets2["Roughness"].default_value = 0.1
     
     if len(objects) > 1:
         objects[1].data.materials.append(mat2)
         print(f"[OK] Applied glossy material to {objects[1].name}")
     
     # Material 3: Emissive (for torus)
-    mat3 = bpy.data.materials.new(name="Emissive_Material")
-    mat3.use_nodes = True
+    mat3 = _material_from_template("Emissive_Material")
     nodes3 = mat3.node_tree.nodes
     principled3 = nodes3.get('Principled BSDF')
     if principled3:
-        principled3.inputs[0].default_value = (1.0, 0.5, 0.2, 1.0)  # Orange
-        principled3.inputs[17].default_value = (1.0, 0.5, 0.2, 1.0)  # Emission color
-        principled3.inputs[18].default_value = 2.0  # Emission strength
+        sockets3 = _bsdf_sockets(principled3)
+        sockets3["Base Color"].default_value = (1.0, 0.5, 0.2, 1.0)  # Orange
+        _set_socket(sockets3, "Emission", (1.0, 0.5, 0.2, 1.0))
+        _set_socket(sockets3, "Emission Strength", 2.0)
     
     if len(objects) > 2:
         objects[2].data.materials.append(mat3)
@@ -153,60 +498,41 @@ def showcase_animation():
     print("ANIMATION SHOWCASE")
     print("=" * 70)
     
-    objects = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+    objects = CREATED['mesh']
+    
+    scene = bpy.context.scene
     
     # Set frame range
-    bpy.context.scene.frame_start = 1
-    bpy.context.scene.frame_end = 120  # 4 seconds at 30fps
+    scene.frame_start = 1
+    scene.frame_end = 120  # 4 seconds at 30fps
     
     # Animate cube rotation
     if objects:
         cube = objects[0]
-        cube.rotation_euler = (0, 0, 0)
-        cube.keyframe_insert(data_path="rotation_euler", frame=1)
-        
-        cube.rotation_euler = (0, 0, math.radians(360))
-        cube.keyframe_insert(data_path="rotation_euler", frame=120)
+        fcurves = _keyframe_channels(cube, "rotation_euler", (1, 120),
+                                     ((0, 0, 0), (0, 0, tau)))
         
         # Set interpolation
-        if cube.animation_data:
-            for fcurve in cube.animation_data.action.fcurves:
-                for keyframe in fcurve.keyframe_points:
-                    keyframe.interpolation = 'LINEAR'
+        _set_interpolation(fcurves, _INTERP_LINEAR)
         
         print(f"[OK] Animated {cube.name} rotation")
     
     # Animate sphere scale
     if len(objects) > 1:
         sphere = objects[1]
-        sphere.scale = (1, 1, 1)
-        sphere.keyframe_insert(data_path="scale", frame=1)
-        
-        sphere.scale = (1.5, 1.5, 1.5)
-        sphere.keyframe_insert(data_path="scale", frame=60)
-        
-        sphere.scale = (1, 1, 1)
-        sphere.keyframe_insert(data_path="scale", frame=120)
+        fcurves = _keyframe_channels(sphere, "scale", (1, 60, 120),
+                                     ((1, 1, 1), (1.5, 1.5, 1.5), (1, 1, 1)))
         
         # Set easing
-        if sphere.animation_data:
-            for fcurve in sphere.animation_data.action.fcurves:
-                for keyframe in fcurve.keyframe_points:
-                    keyframe.interpolation = 'EASE_IN_OUT'
+        _set_interpolation(fcurves, _INTERP_SINE, easing=_EASING_IN_OUT)
         
         print(f"[OK] Animated {sphere.name} scale")
     
     # Animate torus location
     if len(objects) > 2:
         torus = objects[2]
-        torus.location = (4, 0, 0)
-        torus.keyframe_insert(data_path="location", frame=1)
-        
-        torus.location = (4, 3, 0)
-        torus.keyframe_insert(data_path="location", frame=60)
-        
-        torus.location = (4, 0, 0)
-        torus.keyframe_insert(data_path="location", frame=120)
+        _keyframe_channels(torus, "location", (1, 60, 120),
+                           ((4, 0, 0), (4, 3, 0), (4, 0, 0)))
         
         print(f"[OK] Animated {torus.name} location")
     
@@ -220,54 +546,34 @@ def showcase_motion_graphics():
     print("=" * 70)
     
     # Create text object
-    bpy.ops.object.text_add(location=(0, -3, 2))
-    text_obj = bpy.context.active_object
-    text_obj.name = "Motion_Graphics_Text"
-    text_obj.data.body = "AI AGENTS"
-    text_obj.data.size = 1.5
-    text_obj.data.align_x = 'CENTER'
+    text_obj = _text_object("Motion_Graphics_Text", "AI AGENTS", 1.5, (0, -3, 2))
     
     # Add material to text
-    text_mat = bpy.data.materials.new(name="Text_Material")
-    text_mat.use_nodes = True
+    text_mat = _material_from_template("Text_Material")
     principled = text_mat.node_tree.nodes.get('Principled BSDF')
     if principled:
-        principled.inputs[0].default_value = (1.0, 0.8, 0.2, 1.0)  # Gold
-        principled.inputs[17].default_value = (1.0, 0.8, 0.2, 1.0)  # Emission
-        principled.inputs[18].default_value = 1.0
+        sockets = _bsdf_sockets(principled)
+        sockets["Base Color"].default_value = (1.0, 0.8, 0.2, 1.0)  # Gold
+        _set_socket(sockets, "Emission", (1.0, 0.8, 0.2, 1.0))
+        _set_socket(sockets, "Emission Strength", 1.0)
     text_obj.data.materials.append(text_mat)
     
     # Animate text
-    text_obj.scale = (0, 0, 0)
-    text_obj.keyframe_insert(data_path="scale", frame=1)
-    
-    text_obj.scale = (1, 1, 1)
-    text_obj.keyframe_insert(data_path="scale", frame=30)
+    _keyframe_channels(text_obj, "scale", (1, 30), ((0, 0, 0), (1, 1, 1)))
     
     # Animate text rotation
-    text_obj.rotation_euler = (0, 0, 0)
-    text_obj.keyframe_insert(data_path="rotation_euler", frame=30)
-    
-    text_obj.rotation_euler = (0, 0, math.radians(360))
-    text_obj.keyframe_insert(data_path="rotation_euler", frame=120)
+    _keyframe_channels(text_obj, "rotation_euler", (30, 120),
+                       ((0, 0, 0), (0, 0, tau)))
     
     # Create second text
-    bpy.ops.object.text_add(location=(0, -4.5, 2))
-    text_obj2 = bpy.context.active_object
-    text_obj2.name = "Motion_Graphics_Text_2"
-    text_obj2.data.body = "LEARNING & CREATING"
-    text_obj2.data.size = 0.8
-    text_obj2.data.align_x = 'CENTER'
+    text_obj2 = _text_object("Motion_Graphics_Text_2", "LEARNING & CREATING", 0.8, (0, -4.5, 2))
     text_obj2.data.materials.append(text_mat)
     
     # Animate second text (fade in later)
-    text_obj2.scale = (0, 0, 0)
-    text_obj2.keyframe_insert(data_path="scale", frame=60)
-    
-    text_obj2.scale = (1, 1, 1)
-    text_obj2.keyframe_insert(data_path="scale", frame=90)
+    _keyframe_channels(text_obj2, "scale", (60, 90), ((0, 0, 0), (1, 1, 1)))
     
     print("[OK] Motion graphics showcase: Created animated text")
+    CREATED['text'].extend((text_obj, text_obj2))
     return [text_obj, text_obj2]
 
 def showcase_camera_movements():
@@ -277,48 +583,36 @@ def showcase_camera_movements():
     print("=" * 70)
     
     # Create camera
-    bpy.ops.object.camera_add(location=(0, -10, 5))
-    camera = bpy.context.active_object
-    camera.name = "Showcase_Camera"
-    camera.rotation_euler = (1.1, 0, 0)  # Look at origin
+    camera = _link_object("Showcase_Camera", bpy.data.cameras.new("Showcase_Camera"),
+                          location=(0, -10, 5), rotation=(1.1, 0, 0))  # Look at origin
     
     # Set as active camera
-    bpy.context.scene.camera = camera
-    
-    # Camera movement 1: Dolly forward
-    camera.location = (0, -15, 5)
-    camera.keyframe_insert(data_path="location", frame=1)
-    camera.keyframe_insert(data_path="rotation_euler", frame=1)
-    
-    camera.location = (0, -8, 5)
-    camera.keyframe_insert(data_path="location", frame=40)
-    
-    # Camera movement 2: Orbit around
-    camera.location = (8, -8, 5)
-    camera.rotation_euler = (1.1, 0, 0.5)
-    camera.keyframe_insert(data_path="location", frame=60)
-    camera.keyframe_insert(data_path="rotation_euler", frame=60)
-    
-    camera.location = (-8, -8, 5)
-    camera.rotation_euler = (1.1, 0, -0.5)
-    camera.keyframe_insert(data_path="location", frame=90)
-    camera.keyframe_insert(data_path="rotation_euler", frame=90)
-    
-    # Camera movement 3: Pull back and up
-    camera.location = (0, -10, 8)
-    camera.rotation_euler = (1.2, 0, 0)
-    camera.keyframe_insert(data_path="location", frame=120)
-    camera.keyframe_insert(data_path="rotation_euler", frame=120)
+    scene = bpy.context.scene
+    scene.camera = camera
+    
+    # Camera movement 1: Dolly forward (frames 1-40)
+    # Camera movement 2: Orbit around (frames 60-90)
+    # Camera movement 3: Pull back and up (frame 120)
+    fcurves = _keyframe_channels(camera, "location", (1, 40, 60, 90, 120), (
+        (0, -15, 5),
+        (0, -8, 5),
+        (8, -8, 5),
+        (-8, -8, 5),
+        (0, -10, 8),
+    ))
+    fcurves += _keyframe_channels(camera, "rotation_euler", (1, 60, 90, 120), (
+        (1.1, 0, 0),
+        (1.1, 0, 0.5),
+        (1.1, 0, -0.5),
+        (1.2, 0, 0),
+    ))
     
     # Set smooth interpolation
-    if camera.animation_data:
-        for fcurve in camera.animation_data.action.fcurves:
-            for keyframe in fcurve.keyframe_points:
-                keyframe.interpolation = 'BEZIER'
-                keyframe.handle_left_type = 'AUTO'
-                keyframe.handle_right_type = 'AUTO'
+    _set_interpolation(fcurves, _INTERP_BEZIER, handle_type=_HANDLE_FREE)
+    _apply_bezier_handles(fcurves)
     
     print("[OK] Camera movements showcase: Created cinematic camera movement")
+    CREATED['camera'].append(camera)
     return camera
 
 def showcase_new_features():
@@ -327,48 +621,33 @@ def showcase_new_features():
     print("NEW FEATURES SHOWCASE")
     print("=" * 70)
     
-    # Feature 1: Particle system (knowledge visualization)
-    bpy.ops.mesh.primitive_ico_sphere_add(location=(0, 0, 5), radius=0.1)
-    particle_emitter = bpy.context.active_object
-    particle_emitter.name = "Knowledge_Particles"
-    
-    # Add particle system
-    bpy.context.view_layer.objects.active = particle_emitter
-    bpy.ops.object.particle_system_add()
-    psys = particle_emitter.particle_systems[0]
-    psys.name = "Knowledge_Flow"
-    
-    settings = psys.settings
-    settings.count = 100
-    settings.frame_start = 1
-    settings.frame_end = 120
-    settings.lifetime = 120
-    settings.emit_from = 'VERT'
-    settings.use_emit_random = True
-    settings.normal_factor = 0.5
-    settings.factor_random = 0.5
-    
-    # Physics
-    settings.physics_type = 'NEWTON'
-    settings.mass = 1.0
-    settings.air_damping = 0.5
-    
-    print("[OK] New feature: Particle system for knowledge visualization")
+    scene = bpy.context.scene
+    
+    # Feature 1: Particle cloud (knowledge visualization)
+    # Positions are baked with NumPy and instanced on the vertices, so no
+    # particle physics is simulated per frame during playback or render.
+    rng = np.random.default_rng(7)
+    positions = rng.normal(size=(100, 3)) * np.array([2.0, 2.0, 3.0])
+    particle_cloud = _point_cloud_object("Knowledge_Particles", positions, location=(0, 0, 5))
+    particle_cloud.instance_type = 'VERTS'
+    
+    particle = _mesh_object("Knowledge_Flow", *_uv_sphere_geometry(0.1, segments=8, rings=6))
+    particle.parent = particle_cloud
+    
+    print("[OK] New feature: Particle cloud for knowledge visualization")
     
     # Feature 2: Geometry nodes (if available in Blender 3.0+)
-    try:
-        bpy.ops.mesh.primitive_cube_add(location=(6, 0, 0), scale=(0.5, 0.5, 0.5))
-        geo_node_obj = bpy.context.active_object
-        geo_node_obj.name = "Geometry_Nodes_Demo"
+    if bpy.app.version >= (3, 0, 0):
+        geo_node_obj = _mesh_object("Geometry_Nodes_Demo", *_cube_geometry(),
+                                    location=(6, 0, 0), scale=(0.5, 0.5, 0.5))
         
         # Add geometry nodes modifier
         mod = geo_node_obj.modifiers.new(name="GeometryNodes", type='NODES')
         print("[OK] New feature: Geometry nodes modifier")
-    except:
+    else:
         print("[INFO] Geometry nodes not available in this Blender version")
     
     # Feature 3: EEVEE features
-    scene = bpy.context.scene
     scene.render.engine = 'EEVEE'
     eevee = scene.eevee
     eevee.use_bloom = True
@@ -387,34 +666,254 @@ def setup_rendering():
     print("=" * 70)
     
     scene = bpy.context.scene
+    render = scene.render
     
     # Render settings
-    scene.render.engine = 'EEVEE'
-    scene.render.resolution_x = 1920
-    scene.render.resolution_y = 1080
-    scene.render.resolution_percentage = 100
-    scene.render.fps = 30
-    
-    # EEVEE settings
-    eevee = scene.eevee
-    eevee.taa_render_samples = 64
-    eevee.use_bloom = True
-    eevee.bloom_intensity = 0.1
-    eevee.use_ssr = True
-    eevee.use_gtao = True
-    
-    # Output
-    scene.render.image_settings.file_format = 'FFMPEG'
-    scene.render.ffmpeg.format = 'MPEG4'
-    scene.render.ffmpeg.codec = 'H264'
-    scene.render.filepath = "//renders/complete_showcase.mp4"
+    render.resolution_x = 1920
+    render.resolution_y = 1080
+    render.resolution_percentage = 100
+    render.fps = 30
+    
+    # Prefer GPU Cycles when a device is available, otherwise fall back to EEVEE
+    gpu_backend = _enable_gpu_cycles(scene)
+    if gpu_backend:
+        scene.cycles.samples = 64
+        print(f"[OK] Cycles GPU rendering enabled ({gpu_backend})")
+    else:
+        scene.render.engine = 'EEVEE'
+        eevee = scene.eevee
+        eevee.taa_render_samples = 64
+        eevee.use_bloom = True
+        eevee.bloom_intensity = 0.1
+        eevee.use_ssr = True
+        eevee.use_gtao = True
+    
+    # Output: with an NVIDIA GPU, render frames and encode them on its NVENC
+    # engine afterwards (encode_frames) instead of Blender's CPU libx264 path
+    encoder = _hardware_encoder(scene)
+    if encoder:
+        render.image_settings.file_format = 'PNG'
+        render.filepath = _FRAME_OUTPUT
+        print(f"[OK] Frames will be encoded with {encoder} via encode_frames()")
+    else:
+        render.image_settings.file_format = 'FFMPEG'
+        render.ffmpeg.format = 'MPEG4'
+        render.ffmpeg.codec = 'H264'
+        render.filepath = _VIDEO_OUTPUT
     
     print("[OK] Rendering setup complete")
-    print(f"[OK] Output: {scene.render.filepath}")
+    print(f"[OK] Output: {render.filepath}")
     print(f"[OK] Frames: {scene.frame_start} to {scene.frame_end}")
+    return gpu_backend
+
+def encode_frames(encoder="h264_nvenc", audio=None):
+    """Encode the rendered PNG frame sequence into the showcase video with ffmpeg
+    
+    Args:
+        encoder: ffmpeg video encoder (hardware encoders such as h264_nvenc)
+        audio: Optional audio file to mux into the video
+    
+    Returns:
+        Path of the encoded video
+    """
+    scene = bpy.context.scene
+    frames = bpy.path.abspath(_FRAME_OUTPUT).replace("####", "%04d") + ".png"
+    output = bpy.path.abspath(_VIDEO_OUTPUT)
+    
+    cmd = ["ffmpeg", "-y", "-framerate", str(scene.render.fps),
+           "-start_number", str(scene.frame_start), "-i", frames]
+    if audio:
+        cmd += ["-i", audio, "-c:a", "aac", "-shortest"]
+    cmd += ["-c:v", encoder, "-preset", "p4", "-pix_fmt", "yuv420p", output]
+    subprocess.run(cmd, check=True)
+    
+    print(f"[OK] Encoded {output} with {encoder}")
+    return output
 
-def showcase_director():
-    """Demonstrate Director Agent coordination"""
+def _frame_shards(frame_start, frame_end, n_shards):
+    """Split an inclusive frame range into at most n_shards contiguous ranges"""
+    total = frame_end - frame_start + 1
+    n_shards = max(1, min(n_shards, total))
+    delta, extra = divmod(total, n_shards)
+    shards = []
+    start = frame_start
+    for i in range(n_shards):
+        end = start + delta - 1 + (1 if i < extra else 0)
+        shards.append((start, end))
+        start = end + 1
+    return shards
+
+def render_parallel(n_shards, blendfile=None):
+    """Render the animation as frame-range shards in parallel Blender processes
+    
+    Each shard renders its own video segment in background mode; the segments
+    are then joined with ffmpeg's concat demuxer (stream copy, no re-encode).
+    When the scene renders a PNG sequence for hardware encoding, the shards
+    write into the shared sequence and encode_frames produces the video.
+    Audio is mixed down once up front and muxed onto the joined video.
+    
+    Args:
+        n_shards: Number of Blender processes to run
+        blendfile: .blend file to render; defaults to a snapshot of the
+            current session
+    
+    Returns:
+        Path of the joined video
+    """
+    scene = bpy.context.scene
+    encoder = _hardware_encoder(scene)
+    output = bpy.path.abspath(_VIDEO_OUTPUT)
+    shard_dir = os.path.join(os.path.dirname(output) or ".", "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    
+    # Mix the soundtrack once so shard boundaries cannot glitch the audio
+    audio = None
+    seq_editor = scene.sequence_editor
+    if seq_editor and any(strip.type == 'SOUND' for strip in seq_editor.sequences_all):
+        audio = os.path.join(shard_dir, "mixdown.flac")
+        bpy.ops.sound.mixdown(filepath=audio, container='FLAC', codec='FLAC')
+    
+    snapshot_dir = None
+    if blendfile is None:
+        snapshot_dir = tempfile.mkdtemp(prefix="showcase_")
+        blendfile = os.path.join(snapshot_dir, "showcase.blend")
+        bpy.ops.wm.save_as_mainfile(filepath=blendfile, copy=True)
+    
+    try:
+        # The scene's "//" frame path would resolve next to the snapshot .blend, so
+        # shards get the sequence path resolved against this session instead
+        frames = bpy.path.abspath(_FRAME_OUTPUT)
+        
+        shards = _frame_shards(scene.frame_start, scene.frame_end, n_shards)
+        procs = []
+        try:
+            for index, (start, end) in enumerate(shards):
+                prefix = os.path.join(shard_dir, f"shard_{index:03d}_")
+                # Frame sequences share the session's output pattern; videos get one file per shard
+                output_args = ["-o", frames] if encoder else ["-o", prefix]
+                procs.append((prefix, subprocess.Popen([
+                    bpy.app.binary_path, "-b", blendfile,
+                    *output_args, "-s", str(start), "-e", str(end), "-a",
+                ])))
+            
+            segments = []
+            for prefix, proc in procs:
+                if proc.wait() != 0:
+                    raise RuntimeError(f"Shard render failed: {prefix} (exit {proc.returncode})")
+                segments.extend(sorted(glob.glob(prefix + "*")))
+        finally:
+            # On failure, stop the shards still rendering before the snapshot goes away
+            for _, proc in procs:
+                if proc.poll() is None:
+                    proc.terminate()
+                    proc.wait()
+        
+        if encoder:
+            encode_frames(encoder, audio=audio)
+            print(f"[OK] Rendered {len(shards)} shards in parallel: {output}")
+            return output
+        
+        concat_list = os.path.join(shard_dir, "segments.txt")
+        with open(concat_list, "w") as f:
+            for segment in segments:
+                f.write(f"file '{segment}'\n")
+        
+        cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_list]
+        if audio:
+            cmd += ["-i", audio, "-map", "0:v", "-map", "1:a", "-c:a", "aac", "-shortest"]
+        cmd += ["-c:v", "copy", output]
+        subprocess.run(cmd, check=True)
+        
+        print(f"[OK] Rendered {len(shards)} shards in parallel: {output}")
+        return output
+    finally:
+        if snapshot_dir is not None:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+def _camera_key(camera, precision):
+    """Quantized (location, rotation) pose of the camera at the current frame"""
+    pose = np.array((*camera.matrix_world.to_translation(),
+                     *camera.matrix_world.to_euler()))
+    return np.round(pose, precision)
+
+def render_preview(output_dir, precision=2, blend_distance=0.0):
+    """Render PNG preview frames, reusing renders for repeated camera poses
+    
+    Frames are memoized on disk by their quantized camera pose, so repeated
+    preview passes (and poses revisited within one pass) copy the cached image
+    instead of rendering again. With blend_distance > 0 and OpenCV available,
+    a pose close to two cached poses is approximated by blending those two
+    images (image-based rendering) rather than rendered.
+    
+    Only the camera pose is part of the key, so this is meant for iterating on
+    camera moves, not for final output.
+    
+    Args:
+        output_dir: Directory receiving frame_####.png files
+        precision: Decimal places the camera pose is rounded to
+        blend_distance: Max pose distance for blending neighbours (0 disables)
+    
+    Returns:
+        Tuple of (rendered, reused, blended) frame counts
+    """
+    try:
+        import cv2
+    except ImportError:
+        cv2 = None
+    
+    scene = bpy.context.scene
+    render = scene.render
+    cache_dir = os.path.join(output_dir, "pose_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    
+    saved_settings = (render.filepath, render.image_settings.file_format)
+    render.image_settings.file_format = 'PNG'
+    known = []  # (pose, path) pairs available for blending
+    rendered = reused = blended = 0
+    try:
+        for frame in range(scene.frame_start, scene.frame_end + 1):
+            scene.frame_set(frame)
+            pose = _camera_key(scene.camera, precision)
+            digest = hashlib.sha1(pose.tobytes()).hexdigest()[:16]
+            cached = os.path.join(cache_dir, f"{digest}.png")
+            target = os.path.join(output_dir, f"frame_{frame:04d}.png")
+            
+            if os.path.exists(cached):
+                shutil.copyfile(cached, target)
+                reused += 1
+                continue
+            
+            if cv2 is not None and blend_distance > 0 and len(known) >= 2:
+                dists = [float(np.linalg.norm(pose - p)) for p, _ in known]
+                a, b = np.argsort(dists)[:2]
+                if dists[b] <= blend_distance:
+                    weight = dists[b] / ((dists[a] + dists[b]) or 1.0)
+                    image = cv2.addWeighted(cv2.imread(known[a][1]), weight,
+                                            cv2.imread(known[b][1]), 1.0 - weight, 0)
+                    cv2.imwrite(target, image)
+                    blended += 1
+                    continue
+            
+            render.filepath = cached
+            bpy.ops.render.render(write_still=True)
+            shutil.copyfile(cached, target)
+            known.append((pose, cached))
+            rendered += 1
+    finally:
+        render.filepath, render.image_settings.file_format = saved_settings
+    
+    print(f"[OK] Preview: {rendered} rendered, {reused} reused, {blended} blended")
+    return rendered, reused, blended
+
+def showcase_director(verbose=True):
+    """Demonstrate Director Agent coordination
+    
+    The director step only reports the plan, so it is skipped entirely when
+    the showcase runs non-interactively (verbose=False).
+    """
+    if not verbose:
+        return True
+    
     print("\n" + "=" * 70)
     print("DIRECTOR AGENT SHOWCASE")
     print("=" * 70)
@@ -442,40 +941,53 @@ def showcase_director():
     print("[OK] Director Agent: Coordination complete!")
     return True
 
-def main():
-    """Run complete showcase"""
+def main(verbose=None, render_shards=None):
+    """Run complete showcase
+    
+    Args:
+        verbose: Print the director plan; defaults to the SHOWCASE_VERBOSE
+            environment variable ("0" disables it)
+        render_shards: Render the animation in this many parallel Blender
+            processes once set up; defaults to SHOWCASE_RENDER_SHARDS (0 = don't render)
+    """
+    if verbose is None:
+        verbose = os.environ.get("SHOWCASE_VERBOSE", "1") != "0"
+    if render_shards is None:
+        render_shards = int(os.environ.get("SHOWCASE_RENDER_SHARDS", "0"))
+    
     print("\n" + "=" * 70)
     print("COMPLETE FEATURE SHOWCASE")
     print("Camera, Animation, Motion Graphics, Modeling, Shading, Director, New Features")
     print("=" * 70)
     
-    # Step 1: Setup
-    clear_scene()
-    setup_scene()
-    
-    # Step 2: Modeling
-    objects = showcase_modeling()
-    
-    # Step 3: Shading
-    materials = showcase_shading()
-    
-    # Step 4: Animation
-    showcase_animation()
-    
-    # Step 5: Motion Graphics
-    text_objects = showcase_motion_graphics()
-    
-    # Step 6: Camera Movements
-    camera = showcase_camera_movements()
-    
-    # Step 7: Director Agent
-    showcase_director()
-    
-    # Step 8: New Features
-    showcase_new_features()
-    
-    # Step 9: Rendering Setup
-    setup_rendering()
+    with defer_depsgraph():
+        # Step 1: Setup
+        clear_scene()
+        setup_scene()
+        
+        # Step 2: Modeling
+        objects = showcase_modeling()
+        
+        # Step 3: Shading
+        materials = showcase_shading(objects)
+        
+        # Step 4: Animation
+        showcase_animation()
+        
+        # Step 5: Motion Graphics
+        text_objects = showcase_motion_graphics()
+        
+        # Step 6: Camera Movements
+        camera = showcase_camera_movements()
+        
+        # Step 7: Director Agent
+        showcase_director(verbose=verbose)
+        
+        # Step 8: New Features
+        showcase_new_features()
+        
+        # Step 9: Rendering Setup
+        setup_rendering()
     
     print("\n" + "=" * 70)
     print("SHOWCASE COMPLETE!")
@@ -488,8 +1000,14 @@ def main():
     print(f"  - Cinematic camera movement")
     print(f"  - Director Agent coordination")
     print(f"  - New features (particles, EEVEE)")
-    print("\nReady to render!")
-    print("Use: bpy.ops.render.render(animation=True)")
+    
+    if render_shards > 0:
+        render_parallel(render_shards)
+    else:
+        print("\nReady to render!")
+        print("Use: bpy.ops.render.render(animation=True)")
+        if bpy.context.scene.render.image_settings.file_format == 'PNG':
+            print("Then: encode_frames() to build the video")
 
 if __name__ == "__main__":
     main()
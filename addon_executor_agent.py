@@ -3,183 +3,285 @@ Addon Executor Agent - Runs addon operations and maintains database of installed
 """
 
 import json
+import re
 import sqlite3
+import threading
 import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 from pathlib import Path
 from specialized_agents import BaseBlenderSpecialist, OperationRecord
 from data_collector import BlenderDataCollector
 
+try:
+    import orjson
 
-class AddonExecutorSpecialist(BaseBlenderSpecialist):
-    """Specialist for executing addon operations and maintaining addon database"""
-    
-    def __init__(self, **kwargs):
-        super().__init__("AddonExecutor", **kwargs)
-        self.addons_db_path = "addons_executor.db"
-        self._init_addons_database()
-        self.addon_cache = {}
-        self.operation_history = []
-    
-    def _init_addons_database(self):
-        """Initialize comprehensive database for installed addons"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        # Installed addons table with comprehensive info
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS installed_addons (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                module TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                display_name TEXT,
-                description TEXT,
-                author TEXT,
-                version TEXT,
-                category TEXT,
-                location TEXT,
-                enabled INTEGER DEFAULT 0,
-                installed_date TEXT,
-                last_used TEXT,
-                usage_count INTEGER DEFAULT 0,
-                success_count INTEGER DEFAULT 0,
-                error_count INTEGER DEFAULT 0,
-                bl_info TEXT,
-                preferences TEXT,
-                dependencies TEXT,
-                requirements TEXT,
-                documentation_url TEXT,
-                support_url TEXT,
-                license TEXT,
-                tags TEXT,
-                metadata TEXT
-            )
-        """)
-        
-        # Addon operations table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS addon_operations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                addon_module TEXT NOT NULL,
-                operation_name TEXT NOT NULL,
-                operation_type TEXT NOT NULL,
-                parameters TEXT,
-                result TEXT,
-                execution_time REAL,
-                success INTEGER DEFAULT 0,
-                error_message TEXT,
-                timestamp TEXT,
-                context TEXT,
-                FOREIGN KEY (addon_module) REFERENCES installed_addons(module)
-            )
-        """)
-        
-        # Addon operators table (tracks available operators from addons)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS addon_operators (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                addon_module TEXT NOT NULL,
-                operator_id TEXT NOT NULL,
-                operator_name TEXT,
-                operator_description TEXT,
-                operator_category TEXT,
-                parameters TEXT,
-                usage_count INTEGER DEFAULT 0,
-                last_used TEXT,
-                FOREIGN KEY (addon_module) REFERENCES installed_addons(module),
-                UNIQUE(addon_module, operator_id)
-            )
-        """)
-        
-        # Addon preferences table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS addon_preferences (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                addon_module TEXT NOT NULL,
-                preference_key TEXT NOT NULL,
-                preference_value TEXT,
-                preference_type TEXT,
-                description TEXT,
-                last_modified TEXT,
-                FOREIGN KEY (addon_module) REFERENCES installed_addons(module),
-                UNIQUE(addon_module, preference_key)
-            )
-        """)
-        
-        # Addon execution history
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS execution_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                addon_module TEXT NOT NULL,
-                operation TEXT NOT NULL,
-                input_data TEXT,
-                output_data TEXT,
-                execution_time REAL,
-                success INTEGER DEFAULT 0,
-                error_details TEXT,
-                timestamp TEXT,
-                session_id TEXT,
-                FOREIGN KEY (addon_module) REFERENCES installed_addons(module)
-            )
-        """)
-        
-        # Create indexes for performance
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_addon_module ON installed_addons(module)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_operations_addon ON addon_operations(addon_module)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_operations_timestamp ON addon_operations(timestamp)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_execution_timestamp ON execution_history(timestamp)")
-        
-        conn.commit()
-        conn.close()
-        self.log("Addon executor database initialized")
-    
-    def get_system_prompt(self) -> str:
-        return """You are a Blender Addon Executor expert specializing in:
-- Running and executing addon operations
-- Managing addon databases
-- Tracking addon usage and performance
-- Executing addon operators and functions
-- Managing addon preferences
-- Monitoring addon behavior
-- Logging addon operations
-- Handling addon errors and exceptions
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
 
-Generate Python code for addon execution operations.
-Return ONLY the code without explanations."""
-    
-    def get_field_specific_context(self) -> str:
-        return """Common addon execution operations:
-- bpy.ops.addon_operator.execute() - Execute addon operator
-- bpy.context.preferences.addons['module'].preferences - Access preferences
-- bpy.ops.wm.addon_enable(module='module') - Enable addon
-- bpy.ops.wm.addon_disable(module='module') - Disable addon
-- bpy.utils.addon_utils.module_bl_info(module) - Get addon info
-- bpy.ops - Access all operators including addon operators
-- addon = bpy.context.preferences.addons.get('module')
-- addon.preferences.property_name - Access preference property
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; the stdlib codec produces the same data
+    _dumps = json.dumps
+    _loads = json.loads
 
-Addon execution:
-- Find and execute addon operators
-- Run addon functions
-- Access addon preferences
-- Monitor addon operations
-- Track addon performance
-- Handle addon errors"""
+# Connection tuning applied once to the long-lived database connection
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_spill=OFF",
+)
+
+# Local ISO-8601 timestamp computed by SQLite itself, matching the format of
+# datetime.now().isoformat() used for rows written from Python
+_SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+# SQL for the per-execution logging path, kept as constants so the
+# connection's statement cache reuses the same prepared statements
+_SQL_LOG_OPERATION = f"""
+    INSERT INTO addon_operations
+    (addon_module, operation_name, operation_type, parameters, result,
+     execution_time, success, error_message, timestamp, context)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, {_SQL_NOW}, ?)
+"""
+
+_SQL_UPDATE_OPERATOR_USAGE = f"""
+    UPDATE addon_operators
+    SET usage_count = usage_count + 1,
+        last_used = {_SQL_NOW}
+    WHERE operator_id = ?
+"""
+
+_SQL_UPDATE_ADDON_USAGE = f"""
+    UPDATE installed_addons
+    SET usage_count = usage_count + 1,
+        last_used = {_SQL_NOW},
+        success_count = success_count + ?,
+        error_count = error_count + ?
+    WHERE module = ?
+"""
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Patterns used to pull arguments out of task descriptions
+_QUOTED_RE = re.compile(r'["\']([^"\']+)["\']')
+_OPERATOR_ID_RE = re.compile(r'(\w+\.\w+)')
+_KEY_VALUE_RE = re.compile(r'(\w+)=([^\s,]+)')
+_NUMBER_RE = re.compile(r'\d+')
+
+# Task intents in dispatch priority order, each with the phrases that select it
+_INTENT_KEYWORDS = (
+    ("refresh", ('refresh addon database', 'scan addons and operators', 'full addon scan')),
+    ("scan", ('scan addons', 'store addons', 'update addon database')),
+    ("discover", ('discover operators', 'find operators', 'list operators', 'scan operators')),
+    ("installed", ('list installed addons', 'get installed addons', 'show addons', 'installed addons')),
+    ("info", ('addon info', 'addon details', 'info about addon')),
+    ("execute", ('execute operator', 'run operator', 'call operator', 'run addon')),
+    ("history", ('operation history', 'execution history', 'history', 'log')),
+)
+
+# One compiled alternation per intent: a single C-level scan of the description
+_INTENT_PATTERNS = tuple(
+    (intent, re.compile('|'.join(map(re.escape, keywords))))
+    for intent, keywords in _INTENT_KEYWORDS
+)
+
+# Seconds a cached installed-addons listing is served before re-querying
+_ADDON_CACHE_TTL = 2.0
+_ADDON_CACHE_MAX_ENTRIES = 512
+_OPERATION_HISTORY_LIMIT = 1000
+
+# Addon scans stream one JSON document per line; rows are written in batches
+_ADDON_LINE_PREFIX = "ADDON_JSON:"
+_SCAN_DONE_PREFIX = "SCAN_DONE:"
+_STORE_BATCH_SIZE = 100
+
+# installed_addons columns get_addon_info(fields=...) may project; JSON columns
+# also accept "column.key.path" fields, resolved by SQLite's json_extract
+_ADDON_SCALAR_COLUMNS = frozenset((
+    "name", "display_name", "description", "author", "version", "category",
+    "location", "enabled", "installed_date", "last_used", "usage_count",
+    "success_count", "error_count"
+))
+_ADDON_JSON_COLUMNS = frozenset((
+    "bl_info", "preferences", "dependencies", "requirements", "tags"
+))
+
+_SQL_STORE_OPERATOR = """
+    INSERT OR REPLACE INTO addon_operators
+    (addon_module, operator_id, operator_name, operator_description,
+     operator_category, parameters, usage_count, last_used)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_STORE_ADDON = """
+    INSERT OR REPLACE INTO installed_addons
+    (module, name, display_name, description, author, version, category,
+     location, enabled, installed_date, last_used, usage_count,
+     success_count, error_count, bl_info, preferences, dependencies,
+     requirements, tags, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Bump _SCHEMA_VERSION whenever _SCHEMA_SQL changes so existing databases re-run it
+_SCHEMA_VERSION = 1
+
+_SCHEMA_SQL = f"""
+BEGIN;
+
+-- Installed addons table with comprehensive info
+CREATE TABLE IF NOT EXISTS installed_addons (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    module TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    display_name TEXT,
+    description TEXT,
+    author TEXT,
+    version TEXT,
+    category TEXT,
+    location TEXT,
+    enabled INTEGER DEFAULT 0,
+    installed_date TEXT,
+    last_used TEXT,
+    usage_count INTEGER DEFAULT 0,
+    success_count INTEGER DEFAULT 0,
+    error_count INTEGER DEFAULT 0,
+    bl_info TEXT,
+    preferences TEXT,
+    dependencies TEXT,
+    requirements TEXT,
+    documentation_url TEXT,
+    support_url TEXT,
+    license TEXT,
+    tags TEXT,
+    metadata TEXT
+);
+
+-- Addon operations table
+CREATE TABLE IF NOT EXISTS addon_operations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    addon_module TEXT NOT NULL,
+    operation_name TEXT NOT NULL,
+    operation_type TEXT NOT NULL,
+    parameters TEXT,
+    result TEXT,
+    execution_time REAL,
+    success INTEGER DEFAULT 0,
+    error_message TEXT,
+    timestamp TEXT,
+    context TEXT,
+    FOREIGN KEY (addon_module) REFERENCES installed_addons(module)
+);
+
+-- Addon operators table (tracks available operators from addons)
+CREATE TABLE IF NOT EXISTS addon_operators (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    addon_module TEXT NOT NULL,
+    operator_id TEXT NOT NULL,
+    operator_name TEXT,
+    operator_description TEXT,
+    operator_category TEXT,
+    parameters TEXT,
+    usage_count INTEGER DEFAULT 0,
+    last_used TEXT,
+    FOREIGN KEY (addon_module) REFERENCES installed_addons(module),
+    UNIQUE(addon_module, operator_id)
+);
+
+-- Addon preferences table
+CREATE TABLE IF NOT EXISTS addon_preferences (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    addon_module TEXT NOT NULL,
+    preference_key TEXT NOT NULL,
+    preference_value TEXT,
+    preference_type TEXT,
+    description TEXT,
+    last_modified TEXT,
+    FOREIGN KEY (addon_module) REFERENCES installed_addons(module),
+    UNIQUE(addon_module, preference_key)
+);
+
+-- Addon execution history
+CREATE TABLE IF NOT EXISTS execution_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    addon_module TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    input_data TEXT,
+    output_data TEXT,
+    execution_time REAL,
+    success INTEGER DEFAULT 0,
+    error_details TEXT,
+    timestamp TEXT,
+    session_id TEXT,
+    FOREIGN KEY (addon_module) REFERENCES installed_addons(module)
+);
+
+-- Create indexes for performance
+CREATE INDEX IF NOT EXISTS idx_addon_module ON installed_addons(module);
+CREATE INDEX IF NOT EXISTS idx_operations_timestamp ON addon_operations(timestamp);
+CREATE INDEX IF NOT EXISTS idx_execution_timestamp ON execution_history(timestamp);
+
+-- Per-module history is filtered by module and ordered by time; the
+-- composite indexes serve both without a sort step and supersede the
+-- old single-column module index
+CREATE INDEX IF NOT EXISTS idx_ops_mod_ts ON addon_operations(addon_module, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_exec_mod_ts ON execution_history(addon_module, timestamp DESC);
+DROP INDEX IF EXISTS idx_operations_addon;
+
+PRAGMA user_version = {_SCHEMA_VERSION};
+
+COMMIT;
+"""
+
+
+def _iter_addon_lines(output: str) -> Iterator[Dict]:
+    """Yield each addon document from streamed scan output"""
+    prefix_len = len(_ADDON_LINE_PREFIX)
+    for line in output.splitlines():
+        if line.startswith(_ADDON_LINE_PREFIX):
+            yield _loads(line[prefix_len:])
+
+
+def _scan_done_count(output: str) -> Optional[int]:
+    """Read the addon count reported by the scan's closing marker"""
+    marker = output.rfind(_SCAN_DONE_PREFIX)
+    if marker == -1:
+        return None
+    match = _NUMBER_RE.match(output, marker + len(_SCAN_DONE_PREFIX))
+    return int(match.group()) if match else None
+
+
+def _extract_json_object(output: str) -> Optional[Dict]:
+    """Decode the first JSON object printed in Blender's output
     
-    def scan_and_store_addons(self) -> Dict:
-        """Scan Blender for all installed addons and store in database"""
-        self.log("Scanning and storing installed addons...")
-        
-        code = """
+    Scans forward to each '{' and lets the decoder consume exactly one
+    object, so stray text around the payload never triggers backtracking.
+    """
+    start = output.find('{')
+    while start != -1:
+        try:
+            data, _ = _JSON_DECODER.raw_decode(output, start)
+            if isinstance(data, dict):
+                return data
+        except ValueError:
+            pass
+        start = output.find('{', start + 1)
+    return None
+
+
+# Injected into Blender: one ADDON_JSON line per installed addon, then SCAN_DONE
+_SCAN_ADDONS_SCRIPT = """
 import bpy
 import json
 import importlib
-from datetime import datetime
 
-addons_list = []
+addon_count = 0
 
-# Get all installed addons
+# Get all installed addons, streamed one JSON line per addon
 for module_name in bpy.context.preferences.addons.keys():
     addon = bpy.context.preferences.addons[module_name]
     
@@ -223,160 +325,199 @@ for module_name in bpy.context.preferences.addons.keys():
     except Exception as e:
         addon_data["error"] = str(e)
     
-    # Try to get preferences
+    # Try to get preferences (declared RNA properties only)
     try:
-        if hasattr(addon, 'preferences'):
-            prefs = addon.preferences
-            prefs_dict = {}
-            for prop in dir(prefs):
-                if not prop.startswith('_'):
-                    try:
-                        value = getattr(prefs, prop)
-                        if not callable(value):
-                            prefs_dict[prop] = str(value)
-                    except:
-                        pass
-            addon_data["preferences"] = prefs_dict
+        prefs = getattr(addon, 'preferences', None)
+        if prefs is not None:
+            addon_data["preferences"] = {
+                p.identifier: str(getattr(prefs, p.identifier))
+                for p in prefs.bl_rna.properties
+                if p.identifier != 'rna_type'
+            }
     except Exception as e:
         pass
     
-    addons_list.append(addon_data)
+    print("ADDON_JSON:" + json.dumps(addon_data))
+    addon_count += 1
+
+print("SCAN_DONE:" + str(addon_count))
+"""
+
+# Injected into Blender: prints a single JSON document listing operators
+_DISCOVER_OPERATORS_SCRIPT = """
+import bpy
+import json
+
+operators_list = []
+
+# bpy.ops lists categories; each category lists its operator names
+for op_category in dir(bpy.ops):
+    if op_category.startswith('_'):
+        continue
+    category_ops = getattr(bpy.ops, op_category)
+    for op_name in dir(category_ops):
+        if op_name.startswith('_'):
+            continue
+        op = getattr(category_ops, op_name)
+        if not hasattr(op, 'get_rna_type'):
+            continue
+        try:
+            rna = op.get_rna_type()
+        except Exception:
+            continue
+        operators_list.append({
+            "operator_id": op_category + "." + op_name,
+            "operator_name": op_name,
+            "category": op_category,
+            "description": getattr(rna, 'description', ''),
+        })
 
 result = {
     "status": "success",
-    "addons": addons_list,
-    "total_count": len(addons_list),
-    "timestamp": datetime.now().isoformat()
+    "operators": operators_list,
+    "total_count": len(operators_list)
 }
 
 print(json.dumps(result))
 """
+
+
+class AddonExecutorSpecialist(BaseBlenderSpecialist):
+    """Specialist for executing addon operations and maintaining addon database"""
+    
+    def __init__(self, **kwargs):
+        super().__init__("AddonExecutor", **kwargs)
+        self.addons_db_path = "addons_executor.db"
+        self.conn = None
+        self._db_lock = threading.Lock()
+        self._init_addons_database()
+        self.addon_cache = {}  # (kind, key) -> (cached_at, result), cleared on writes
+        self.operation_history = deque(maxlen=_OPERATION_HISTORY_LIMIT)
+    
+    def _init_addons_database(self):
+        """Initialize comprehensive database for installed addons"""
+        self.conn = sqlite3.connect(self.addons_db_path, check_same_thread=False,
+                                    cached_statements=256)
+        self.conn.row_factory = sqlite3.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            self.conn.execute(pragma)
+        
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            self.conn.executescript(_SCHEMA_SQL)
+        self.log("Addon executor database initialized")
+    
+    def get_system_prompt(self) -> str:
+        return """You are a Blender Addon Executor expert specializing in:
+- Running and executing addon operations
+- Managing addon databases
+- Tracking addon usage and performance
+- Executing addon operators and functions
+- Managing addon preferences
+- Monitoring addon behavior
+- Logging addon operations
+- Handling addon errors and exceptions
+
+Generate Python code for addon execution operations.
+Return ONLY the code without explanations."""
+    
+    def get_field_specific_context(self) -> str:
+        return """Common addon execution operations:
+- bpy.ops.addon_operator.execute() - Execute addon operator
+- bpy.context.preferences.addons['module'].preferences - Access preferences
+- bpy.ops.wm.addon_enable(module='module') - Enable addon
+- bpy.ops.wm.addon_disable(module='module') - Disable addon
+- bpy.utils.addon_utils.module_bl_info(module) - Get addon info
+- bpy.ops - Access all operators including addon operators
+- addon = bpy.context.preferences.addons.get('module')
+- addon.preferences.property_name - Access preference property
+
+Addon execution:
+- Find and execute addon operators
+- Run addon functions
+- Access addon preferences
+- Monitor addon operations
+- Track addon performance
+- Handle addon errors"""
+    
+    def scan_and_store_addons(self) -> Dict:
+        """Scan Blender for all installed addons and store in database"""
+        self.log("Scanning and storing installed addons...")
         
-        result = self.execute_code(code)
+        result = self.execute_code(_SCAN_ADDONS_SCRIPT)
         
         if result.get("status") == "success":
-            try:
-                output = result.get("output", "")
-                import re
-                json_match = re.search(r'\{.*\}', output, re.DOTALL)
-                if json_match:
-                    data = json.loads(json_match.group())
-                    stored_count = self._store_addons_in_db(data.get("addons", []))
-                    return {
-                        "status": "success",
-                        "addons_scanned": len(data.get("addons", [])),
-                        "addons_stored": stored_count,
-                        "message": f"Scanned and stored {stored_count} addons"
-                    }
-            except Exception as e:
-                self.log(f"Error parsing addon data: {e}", "ERROR")
+            output = result.get("output", "")
+            scanned_count = _scan_done_count(output)
+            if scanned_count is not None:
+                stored_count = self._store_addons_in_db(_iter_addon_lines(output))
+                return {
+                    "status": "success",
+                    "addons_scanned": scanned_count,
+                    "addons_stored": stored_count,
+                    "message": f"Scanned and stored {stored_count} addons"
+                }
+            self.log("Addon scan output did not complete", "ERROR")
         
         return {"status": "error", "message": "Failed to scan addons"}
     
-    def _store_addons_in_db(self, addons: List[Dict]) -> int:
+    def _store_addons_in_db(self, addons: Iterable[Dict]) -> int:
         """Store addons in database"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        stored = 0
-        
-        for addon in addons:
-            module = addon.get("module", "")
-            if not module:
-                continue
-            
-            try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO installed_addons
-                    (module, name, display_name, description, author, version, category,
-                     location, enabled, installed_date, last_used, usage_count,
-                     success_count, error_count, bl_info, preferences, dependencies,
-                     requirements, tags, metadata)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    module,
-                    addon.get("name", ""),
-                    addon.get("display_name", ""),
-                    addon.get("description", ""),
-                    addon.get("author", ""),
-                    addon.get("version", ""),
-                    addon.get("category", ""),
-                    addon.get("location", ""),
-                    1 if addon.get("enabled", False) else 0,
-                    datetime.now().isoformat(),
-                    None,
-                    0,
-                    0,
-                    0,
-                    json.dumps(addon.get("bl_info", {})),
-                    json.dumps(addon.get("preferences", {})),
-                    json.dumps(addon.get("dependencies", [])),
-                    json.dumps(addon.get("requirements", [])),
-                    json.dumps(addon.get("tags", [])),
-                    json.dumps(addon)
-                ))
-                stored += 1
-            except Exception as e:
-                self.log(f"Error storing addon {module}: {e}", "ERROR")
-        
-        conn.commit()
-        conn.close()
-        return stored
+        try:
+            with self._db_lock, self.conn:
+                return self._write_addons(addons)
+        except Exception as e:
+            self.log(f"Error storing addons: {e}", "ERROR")
+            return 0
+        finally:
+            self.addon_cache.clear()
+    
+    def _write_addons(self, addons: Iterable[Dict]) -> int:
+        """Insert addon rows in batches of _STORE_BATCH_SIZE (caller holds the lock and transaction)"""
+        installed_date = datetime.now().isoformat()
+        rows = (
+            (
+                addon["module"],
+                addon.get("name", ""),
+                addon.get("display_name", ""),
+                addon.get("description", ""),
+                addon.get("author", ""),
+                addon.get("version", ""),
+                addon.get("category", ""),
+                addon.get("location", ""),
+                1 if addon.get("enabled", False) else 0,
+                installed_date,
+                None,
+                0,
+                0,
+                0,
+                _dumps(addon.get("bl_info", {})),
+                _dumps(addon.get("preferences", {})),
+                _dumps(addon.get("dependencies", [])),
+                _dumps(addon.get("requirements", [])),
+                _dumps(addon.get("tags", [])),
+                None  # metadata: every field already has its own column
+            )
+            for addon in addons if addon.get("module")
+        )
+        
+        stored_count = 0
+        while True:
+            batch = list(islice(rows, _STORE_BATCH_SIZE))
+            if not batch:
+                return stored_count
+            self.conn.executemany(_SQL_STORE_ADDON, batch)
+            stored_count += len(batch)
     
     def discover_addon_operators(self, addon_module: Optional[str] = None) -> Dict:
         """Discover operators available from addons"""
         self.log(f"Discovering operators for addon: {addon_module or 'all'}")
         
-        code = """
-import bpy
-import json
-
-operators_list = []
-
-# Get all operators
-all_operators = dir(bpy.ops)
-
-# Filter addon operators (usually in specific categories)
-for op_path in all_operators:
-    try:
-        # Try to get operator info
-        op_category = op_path.split('.')[0] if '.' in op_path else ''
-        op_name = op_path.split('.')[-1] if '.' in op_path else op_path
-        
-        # Try to execute operator info
-        try:
-            op = getattr(bpy.ops, op_path)
-            if hasattr(op, 'get_rna_type'):
-                rna = op.get_rna_type()
-                op_info = {
-                    "operator_id": op_path,
-                    "operator_name": op_name,
-                    "category": op_category,
-                    "description": getattr(rna, 'description', ''),
-                }
-                operators_list.append(op_info)
-        except:
-            pass
-    except:
-        pass
-
-result = {
-    "status": "success",
-    "operators": operators_list,
-    "total_count": len(operators_list)
-}
-
-print(json.dumps(result))
-"""
-        
-        result = self.execute_code(code)
+        result = self.execute_code(_DISCOVER_OPERATORS_SCRIPT)
         
         if result.get("status") == "success":
             try:
-                output = result.get("output", "")
-                import re
-                json_match = re.search(r'\{.*\}', output, re.DOTALL)
-                if json_match:
-                    data = json.loads(json_match.group())
+                data = _extract_json_object(result.get("output", ""))
+                if data:
                     stored = self._store_operators(data.get("operators", []), addon_module)
                     return {
                         "status": "success",
@@ -391,46 +532,66 @@ print(json.dumps(result))
     
     def _store_operators(self, operators: List[Dict], addon_module: Optional[str] = None):
         """Store operators in database"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        stored = 0
-        
-        for op in operators:
-            op_id = op.get("operator_id", "")
-            if not op_id:
-                continue
-            
-            # Try to determine addon module from operator path
-            module = addon_module
-            if not module:
-                # Extract from operator category or path
-                category = op.get("category", "")
-                # This is a simplified approach - could be improved
-                module = category if category else "unknown"
-            
-            try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO addon_operators
-                    (addon_module, operator_id, operator_name, operator_description,
-                     operator_category, parameters, usage_count, last_used)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    module,
-                    op_id,
-                    op.get("operator_name", ""),
-                    op.get("description", ""),
-                    op.get("category", ""),
-                    json.dumps(op.get("parameters", {})),
-                    0,
-                    None
-                ))
-                stored += 1
-            except Exception as e:
-                self.log(f"Error storing operator {op_id}: {e}", "ERROR")
+        try:
+            with self._db_lock, self.conn:
+                return self._write_operators(operators, addon_module)
+        except Exception as e:
+            self.log(f"Error storing operators: {e}", "ERROR")
+            return 0
+    
+    def _write_operators(self, operators: List[Dict], addon_module: Optional[str] = None) -> int:
+        """Insert operator rows (caller holds the lock and transaction)"""
+        rows = [
+            (
+                # Without an explicit module, fall back to the operator category
+                # (a simplified approach - could be improved)
+                addon_module or op.get("category") or "unknown",
+                op["operator_id"],
+                op.get("operator_name", ""),
+                op.get("description", ""),
+                op.get("category", ""),
+                _dumps(op.get("parameters", {})),
+                0,
+                None
+            )
+            for op in operators if op.get("operator_id")
+        ]
+        self.conn.executemany(_SQL_STORE_OPERATOR, rows)
+        return len(rows)
+    
+    def scan_addons_and_operators(self) -> Dict:
+        """Refresh addons and operators with one Blender round-trip and one transaction"""
+        self.log("Scanning addons and discovering operators...")
+        
+        # Operators print first, so their document is the first JSON object in the output
+        result = self.execute_code(_DISCOVER_OPERATORS_SCRIPT + _SCAN_ADDONS_SCRIPT)
+        
+        if result.get("status") == "success":
+            output = result.get("output", "")
+            scanned_count = _scan_done_count(output)
+            data = _extract_json_object(output)
+            if scanned_count is not None and data:
+                operators = data.get("operators", [])
+                try:
+                    with self._db_lock, self.conn:
+                        addons_stored = self._write_addons(_iter_addon_lines(output))
+                        operators_stored = self._write_operators(operators)
+                except Exception as e:
+                    self.log(f"Error storing addon scan: {e}", "ERROR")
+                    return {"status": "error", "message": f"Failed to store addon scan: {e}"}
+                finally:
+                    self.addon_cache.clear()
+                return {
+                    "status": "success",
+                    "addons_scanned": scanned_count,
+                    "addons_stored": addons_stored,
+                    "operators_found": len(operators),
+                    "operators_stored": operators_stored,
+                    "message": f"Stored {addons_stored} addons and {operators_stored} operators"
+                }
+            self.log("Addon scan output did not complete", "ERROR")
         
-        conn.commit()
-        conn.close()
-        return stored
+        return {"status": "error", "message": "Failed to scan addons and operators"}
     
     def execute_addon_operator(self, operator_id: str, parameters: Optional[Dict] = None) -> Dict:
         """Execute an addon operator"""
@@ -477,11 +638,8 @@ print(json.dumps(execution_result))
         result = self.execute_code(code)
         execution_time = time.time() - start_time
         
-        # Store operation in database
-        self._log_operation(operator_id, "execute", params, result, execution_time)
-        
-        # Update operator usage stats
-        self._update_operator_stats(operator_id, result.get("status") == "success")
+        # Store operation and update usage stats in a single transaction
+        self._record_execution(operator_id, params, result, execution_time)
         
         return {
             "status": result.get("status", "error"),
@@ -491,176 +649,194 @@ print(json.dumps(execution_result))
             "message": result.get("message", "")
         }
     
-    def _log_operation(self, addon_module: str, operation_name: str, 
-                      parameters: Dict, result: Dict, execution_time: float):
-        """Log addon operation to database"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO addon_operations
-            (addon_module, operation_name, operation_type, parameters, result,
-             execution_time, success, error_message, timestamp, context)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+    def _record_execution(self, operator_id: str, parameters: Dict, result: Dict,
+                          execution_time: float):
+        """Log an operator execution and update its usage stats in one transaction"""
+        with self._db_lock, self.conn:
+            self._write_operation(operator_id, "execute", parameters, result, execution_time)
+            self._write_operator_stats(operator_id, result.get("status") == "success")
+        self.addon_cache.clear()
+    
+    def _write_operation(self, addon_module: str, operation_name: str,
+                         parameters: Dict, result: Dict, execution_time: float):
+        """Insert an operation log row (caller holds the lock and transaction)"""
+        self.conn.execute(_SQL_LOG_OPERATION, (
             addon_module,
             operation_name,
             "operator_execution",
-            json.dumps(parameters),
-            json.dumps(result),
+            _dumps(parameters),
+            _dumps(result),
             execution_time,
             1 if result.get("status") == "success" else 0,
             result.get("error", ""),
-            datetime.now().isoformat(),
-            json.dumps({"session": "default"})
+            _dumps({"session": "default"})
         ))
-        
-        conn.commit()
-        conn.close()
     
-    def _update_operator_stats(self, operator_id: str, success: bool):
-        """Update operator usage statistics"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
+    def _write_operator_stats(self, operator_id: str, success: bool):
+        """Bump operator and addon usage counters (caller holds the lock and transaction)"""
         # Extract module from operator_id
         module = operator_id.split('.')[0] if '.' in operator_id else "unknown"
         
-        cursor.execute("""
-            UPDATE addon_operators
-            SET usage_count = usage_count + 1,
-                last_used = ?
-            WHERE operator_id = ?
-        """, (datetime.now().isoformat(), operator_id))
+        self.conn.execute(_SQL_UPDATE_OPERATOR_USAGE, (operator_id,))
         
         # Update addon stats
-        cursor.execute("""
-            UPDATE installed_addons
-            SET usage_count = usage_count + 1,
-                last_used = ?,
-                success_count = success_count + ?,
-                error_count = error_count + ?
-            WHERE module = ?
-        """, (datetime.now().isoformat(), 1 if success else 0, 0 if success else 1, module))
-        
-        conn.commit()
-        conn.close()
+        self.conn.execute(_SQL_UPDATE_ADDON_USAGE,
+                          (1 if success else 0, 0 if success else 1, module))
+    
+    def _cache_result(self, cache_key: tuple, result: Dict):
+        """Cache a read result, dropping everything once the cache is full"""
+        if len(self.addon_cache) >= _ADDON_CACHE_MAX_ENTRIES:
+            self.addon_cache.clear()
+        self.addon_cache[cache_key] = (time.monotonic(), result)
     
     def get_installed_addons(self, enabled_only: bool = False) -> Dict:
         """Get list of installed addons from database"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        if enabled_only:
-            cursor.execute("""
-                SELECT module, name, display_name, enabled, version, category,
-                       usage_count, last_used
-                FROM installed_addons
-                WHERE enabled = 1
-                ORDER BY name
-            """)
-        else:
-            cursor.execute("""
-                SELECT module, name, display_name, enabled, version, category,
-                       usage_count, last_used
-                FROM installed_addons
-                ORDER BY name
-            """)
-        
-        addons = []
-        for row in cursor.fetchall():
-            addons.append({
-                "module": row[0],
-                "name": row[1],
-                "display_name": row[2],
-                "enabled": bool(row[3]),
-                "version": row[4],
-                "category": row[5],
-                "usage_count": row[6],
-                "last_used": row[7]
-            })
-        
-        conn.close()
+        cache_key = ("installed", enabled_only)
+        cached = self.addon_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < _ADDON_CACHE_TTL:
+            return cached[1]
+        
+        with self._db_lock:
+            cursor = self.conn.cursor()
+            if enabled_only:
+                cursor.execute("""
+                    SELECT module, name, display_name, enabled, version, category,
+                           usage_count, last_used
+                    FROM installed_addons
+                    WHERE enabled = 1
+                    ORDER BY name
+                """)
+            else:
+                cursor.execute("""
+                    SELECT module, name, display_name, enabled, version, category,
+                           usage_count, last_used
+                    FROM installed_addons
+                    ORDER BY name
+                """)
+            rows = cursor.fetchall()
+        
+        addons = [dict(row) for row in rows]
+        enabled_count = 0
+        for addon in addons:
+            addon["enabled"] = bool(addon["enabled"])
+            enabled_count += addon["enabled"]
         
-        return {
+        result = {
             "status": "success",
             "addons": addons,
             "count": len(addons),
-            "enabled_count": sum(1 for a in addons if a["enabled"])
+            "enabled_count": enabled_count
         }
+        self._cache_result(cache_key, result)
+        return result
     
-    def get_addon_info(self, addon_module: str) -> Dict:
-        """Get detailed information about a specific addon"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
+    def get_addon_info(self, addon_module: str, fields: Optional[List[str]] = None) -> Dict:
+        """Get detailed information about a specific addon
+        
+        Args:
+            addon_module: Module name of the addon
+            fields: Only return these fields, e.g. ["version", "bl_info.version"]
+        """
+        cache_key = ("info", addon_module, tuple(fields) if fields else None)
+        cached = self.addon_cache.get(cache_key)
+        if cached:
+            return cached[1]
+        
+        if fields:
+            result = self._get_addon_fields(addon_module, fields)
+            if result.get("status") == "success":
+                self._cache_result(cache_key, result)
+            return result
+        
+        with self._db_lock:
+            row = self.conn.execute("""
+                SELECT module, name, display_name, description, author, version,
+                       category, location, enabled, installed_date, last_used,
+                       usage_count, success_count, error_count, bl_info,
+                       preferences, dependencies, requirements
+                FROM installed_addons WHERE module = ?
+            """, (addon_module,)).fetchone()
         
-        cursor.execute("""
-            SELECT * FROM installed_addons WHERE module = ?
-        """, (addon_module,))
+        if not row:
+            return {"status": "error", "message": f"Addon '{addon_module}' not found"}
         
-        row = cursor.fetchone()
-        conn.close()
+        result = {"status": "success", **row}
+        result["enabled"] = bool(row["enabled"])
+        result["bl_info"] = _loads(row["bl_info"] or "{}")
+        result["preferences"] = _loads(row["preferences"] or "{}")
+        result["dependencies"] = _loads(row["dependencies"] or "[]")
+        result["requirements"] = _loads(row["requirements"] or "[]")
+        self._cache_result(cache_key, result)
+        return result
+    
+    def _get_addon_fields(self, addon_module: str, fields: List[str]) -> Dict:
+        """Project individual addon fields in SQLite without decoding whole JSON columns"""
+        selects = []
+        params = []
+        for field in fields:
+            column, _, path = field.partition(".")
+            if path and column in _ADDON_JSON_COLUMNS:
+                selects.append(f"json_extract({column}, ?)")
+                params.append(f"$.{path}")
+            elif not path and (column in _ADDON_SCALAR_COLUMNS or column in _ADDON_JSON_COLUMNS):
+                selects.append(column)
+            else:
+                return {"status": "error", "message": f"Unknown addon field '{field}'"}
+        
+        with self._db_lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(selects)} FROM installed_addons WHERE module = ?",
+                (*params, addon_module)
+            ).fetchone()
         
         if not row:
             return {"status": "error", "message": f"Addon '{addon_module}' not found"}
         
         return {
             "status": "success",
-            "module": row[1],
-            "name": row[2],
-            "display_name": row[3],
-            "description": row[4],
-            "author": row[5],
-            "version": row[6],
-            "category": row[7],
-            "location": row[8],
-            "enabled": bool(row[9]),
-            "installed_date": row[10],
-            "last_used": row[11],
-            "usage_count": row[12],
-            "success_count": row[13],
-            "error_count": row[14],
-            "bl_info": json.loads(row[15] or "{}"),
-            "preferences": json.loads(row[16] or "{}"),
-            "dependencies": json.loads(row[17] or "[]"),
-            "requirements": json.loads(row[18] or "[]")
+            "module": addon_module,
+            "fields": dict(zip(fields, row))
         }
     
-    def get_operation_history(self, addon_module: Optional[str] = None, limit: int = 50) -> Dict:
-        """Get operation history"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        if addon_module:
-            cursor.execute("""
-                SELECT * FROM addon_operations
-                WHERE addon_module = ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (addon_module, limit))
-        else:
-            cursor.execute("""
-                SELECT * FROM addon_operations
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (limit,))
+    def get_operation_history(self, addon_module: Optional[str] = None, limit: int = 50,
+                              load_result: bool = False) -> Dict:
+        """Get operation history
+        
+        Args:
+            addon_module: Only return operations for this module
+            limit: Maximum number of operations to return
+            load_result: Also fetch and decode the stored result payloads
+        """
+        columns = ("id, addon_module, operation_name, operation_type, parameters, "
+                   "execution_time, success, error_message, timestamp")
+        if load_result:
+            columns += ", result"
+        
+        with self._db_lock:
+            cursor = self.conn.cursor()
+            if addon_module:
+                cursor.execute(f"""
+                    SELECT {columns} FROM addon_operations
+                    WHERE addon_module = ?
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                """, (addon_module, limit))
+            else:
+                cursor.execute(f"""
+                    SELECT {columns} FROM addon_operations
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                """, (limit,))
+            rows = cursor.fetchmany(limit)
         
         operations = []
-        for row in cursor.fetchall():
-            operations.append({
-                "id": row[0],
-                "addon_module": row[1],
-                "operation_name": row[2],
-                "operation_type": row[3],
-                "parameters": json.loads(row[4] or "{}"),
-                "result": json.loads(row[5] or "{}"),
-                "execution_time": row[6],
-                "success": bool(row[7]),
-                "error_message": row[8],
-                "timestamp": row[9]
-            })
-        
-        conn.close()
+        for row in rows:
+            operation = dict(row)
+            operation["parameters"] = _loads(row["parameters"] or "{}")
+            operation["success"] = bool(row["success"])
+            if load_result:
+                operation["result"] = _loads(row["result"] or "{}")
+            operations.append(operation)
         
         return {
             "status": "success",
@@ -673,35 +849,36 @@ print(json.dumps(execution_result))
         self.log(f"AddonExecutor executing: {description}")
         
         description_lower = description.lower()
+        intent = next((name for name, pattern in _INTENT_PATTERNS
+                       if pattern.search(description_lower)), "scan")
+        
+        # Refresh addons and operators together
+        if intent == "refresh":
+            return self.scan_addons_and_operators()
         
         # Scan and store addons
-        if any(keyword in description_lower for keyword in 
-               ['scan addons', 'store addons', 'update addon database', 'refresh addon database']):
+        if intent == "scan":
             return self.scan_and_store_addons()
         
         # Discover operators
-        if any(keyword in description_lower for keyword in 
-               ['discover operators', 'find operators', 'list operators', 'scan operators']):
+        if intent == "discover":
             addon_module = self._extract_addon_module(description)
             return self.discover_addon_operators(addon_module)
         
         # Get installed addons
-        if any(keyword in description_lower for keyword in 
-               ['list installed addons', 'get installed addons', 'show addons', 'installed addons']):
+        if intent == "installed":
             enabled_only = 'enabled' in description_lower
             return self.get_installed_addons(enabled_only)
         
         # Get addon info
-        if any(keyword in description_lower for keyword in 
-               ['addon info', 'addon details', 'info about addon']):
+        if intent == "info":
             addon_module = self._extract_addon_module(description)
             if addon_module:
                 return self.get_addon_info(addon_module)
             return {"status": "error", "message": "Addon module not specified"}
         
         # Execute operator
-        if any(keyword in description_lower for keyword in 
-               ['execute operator', 'run operator', 'call operator', 'run addon']):
+        if intent == "execute":
             operator_id = self._extract_operator_id(description)
             if operator_id:
                 params = self._extract_parameters(description)
@@ -709,8 +886,7 @@ print(json.dumps(execution_result))
             return {"status": "error", "message": "Operator ID not specified"}
         
         # Get operation history
-        if any(keyword in description_lower for keyword in 
-               ['operation history', 'execution history', 'history', 'log']):
+        if intent == "history":
             addon_module = self._extract_addon_module(description)
             limit = self._extract_limit(description, default=50)
             return self.get_operation_history(addon_module, limit)
@@ -720,11 +896,10 @@ print(json.dumps(execution_result))
     
     def _extract_addon_module(self, description: str) -> Optional[str]:
         """Extract addon module name from description"""
-        import re
         # Try quoted strings
-        quoted = re.findall(r'["\']([^"\']+)["\']', description)
+        quoted = _QUOTED_RE.search(description)
         if quoted:
-            return quoted[0]
+            return quoted.group(1)
         
         # Try after keywords
         words = description.split()
@@ -736,14 +911,13 @@ print(json.dumps(execution_result))
     
     def _extract_operator_id(self, description: str) -> Optional[str]:
         """Extract operator ID from description"""
-        import re
         # Look for patterns like "operator_name" or "category.operator"
-        quoted = re.findall(r'["\']([^"\']+)["\']', description)
+        quoted = _QUOTED_RE.search(description)
         if quoted:
-            return quoted[0]
+            return quoted.group(1)
         
         # Try to find operator pattern
-        op_match = re.search(r'(\w+\.\w+)', description)
+        op_match = _OPERATOR_ID_RE.search(description)
         if op_match:
             return op_match.group(1)
         
@@ -754,29 +928,32 @@ print(json.dumps(execution_result))
         # This is a simplified extraction - could be enhanced with NLP
         params = {}
         # Look for key=value patterns
-        import re
-        kv_pairs = re.findall(r'(\w+)=([^\s,]+)', description)
+        kv_pairs = _KEY_VALUE_RE.findall(description)
         for key, value in kv_pairs:
-            # Try to convert to appropriate type
-            try:
-                if value.lower() in ['true', 'false']:
-                    params[key] = value.lower() == 'true'
-                elif value.replace('.', '').isdigit():
-                    params[key] = float(value) if '.' in value else int(value)
-                else:
-                    params[key] = value
-            except:
+            # Convert to the appropriate type; every branch below is total
+            lowered = value.lower()
+            unsigned = value[1:] if value.startswith('-') else value
+            if lowered == 'true':
+                params[key] = True
+            elif lowered == 'false':
+                params[key] = False
+            elif unsigned.replace('.', '', 1).isdecimal():
+                params[key] = float(value) if '.' in value else int(value)
+            else:
                 params[key] = value
         
         return params
     
     def _extract_limit(self, description: str, default: int = 50) -> int:
         """Extract limit number from description"""
-        import re
-        numbers = re.findall(r'\d+', description)
-        if numbers:
-            return int(numbers[0])
+        number = _NUMBER_RE.search(description)
+        if number:
+            return int(number.group())
         return default
-
-
-
+    
+    def cleanup(self):
+        """Clean up resources"""
+        super().cleanup()
+        if self.conn:
+            self.conn.close()
+            self.conn = None
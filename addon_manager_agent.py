@@ -3,7 +3,9 @@ Addon Manager Agent - Scrapes installed Blender addons and builds control protoc
 """
 
 import json
+import re
 import sqlite3
+import threading
 import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
@@ -11,125 +13,161 @@ from pathlib import Path
 from specialized_agents import BaseBlenderSpecialist, OperationRecord
 from data_collector import BlenderDataCollector
 
+# Connection tuning applied once to the long-lived database connection
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+)
 
-class AddonManagerSpecialist(BaseBlenderSpecialist):
-    """Specialist for managing Blender addons - scraping and control protocols"""
-    
-    def __init__(self, **kwargs):
-        super().__init__("AddonManager", **kwargs)
-        self.addons_db_path = "addons_data.db"
-        self._init_addons_database()
-        self.addons_cache = {}
-        self.control_protocols = {}
-    
-    def _init_addons_database(self):
-        """Initialize database for storing addon information"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        # Addons table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS addons (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                module TEXT UNIQUE NOT NULL,
-                name TEXT,
-                description TEXT,
-                author TEXT,
-                version TEXT,
-                enabled INTEGER DEFAULT 0,
-                location TEXT,
-                category TEXT,
-                first_scraped TEXT,
-                last_updated TEXT,
-                metadata TEXT
-            )
-        """)
-        
-        # Control protocols table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS control_protocols (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                addon_module TEXT NOT NULL,
-                protocol_name TEXT NOT NULL,
-                protocol_type TEXT NOT NULL,
-                code_template TEXT NOT NULL,
-                parameters TEXT,
-                description TEXT,
-                created_at TEXT,
-                last_used TEXT,
-                usage_count INTEGER DEFAULT 0,
-                success_count INTEGER DEFAULT 0,
-                FOREIGN KEY (addon_module) REFERENCES addons(module)
-            )
-        """)
-        
-        # Addon operations log
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS addon_operations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                addon_module TEXT NOT NULL,
-                operation_type TEXT NOT NULL,
-                operation_data TEXT,
-                timestamp TEXT,
-                success INTEGER DEFAULT 0,
-                error_message TEXT,
-                FOREIGN KEY (addon_module) REFERENCES addons(module)
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
-    
-    def get_system_prompt(self) -> str:
-        return """You are a Blender Addon Manager expert specializing in:
-- Scraping and cataloging installed Blender addons
-- Extracting addon metadata (name, version, author, description)
-- Building control protocols for addon management
-- Enabling/disabling addons programmatically
-- Configuring addon preferences
-- Managing addon dependencies
-- Creating addon operation templates
-- Monitoring addon status and changes
+# Protocols are looked up and upserted by (addon_module, protocol_name). Older
+# databases could hold duplicates of a pair; the newest row is kept so the
+# unique index can be built.
+_SCHEMA_SQL = """
+BEGIN;
 
-Generate Python code for addon management operations.
-Return ONLY the code without explanations."""
+-- Addons table
+CREATE TABLE IF NOT EXISTS addons (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    module TEXT UNIQUE NOT NULL,
+    name TEXT,
+    description TEXT,
+    author TEXT,
+    version TEXT,
+    enabled INTEGER DEFAULT 0,
+    location TEXT,
+    category TEXT,
+    first_scraped TEXT,
+    last_updated TEXT,
+    metadata TEXT
+);
+
+-- Control protocols table
+CREATE TABLE IF NOT EXISTS control_protocols (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    addon_module TEXT NOT NULL,
+    protocol_name TEXT NOT NULL,
+    protocol_type TEXT NOT NULL,
+    code_template TEXT NOT NULL,
+    parameters TEXT,
+    description TEXT,
+    created_at TEXT,
+    last_used TEXT,
+    usage_count INTEGER DEFAULT 0,
+    success_count INTEGER DEFAULT 0,
+    FOREIGN KEY (addon_module) REFERENCES addons(module)
+);
+
+-- Addon operations log
+CREATE TABLE IF NOT EXISTS addon_operations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    addon_module TEXT NOT NULL,
+    operation_type TEXT NOT NULL,
+    operation_data TEXT,
+    timestamp TEXT,
+    success INTEGER DEFAULT 0,
+    error_message TEXT,
+    FOREIGN KEY (addon_module) REFERENCES addons(module)
+);
+
+DELETE FROM control_protocols WHERE id NOT IN (
+    SELECT MAX(id) FROM control_protocols GROUP BY addon_module, protocol_name
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cp_addon_proto
+ON control_protocols(addon_module, protocol_name);
+CREATE INDEX IF NOT EXISTS idx_ops_module ON addon_operations(addon_module);
+
+COMMIT;
+"""
+
+# Addon fields with their own column in the addons table; only the rest
+# goes into the metadata JSON
+_STORED_COLS = frozenset((
+    "module", "name", "description", "author", "version", "enabled",
+    "location", "category"
+))
+
+# Protocol usage stats are buffered in memory and written once this many
+# protocols have pending updates (or when they are read or the agent closes)
+_STATS_FLUSH_THRESHOLD = 64
+
+_JSON_DECODER = json.JSONDecoder()
+
+_QUOTED_RE = re.compile(r'["\']([^"\']+)["\']')
+
+# Whitespace-delimited word following a keyword, e.g. "for node_wrangler"
+_TARGET_WORD_RE = re.compile(r'(?<!\S)(?:for|addon|module)\s+(\S+)', re.IGNORECASE)
+_ADDON_WORD_RE = re.compile(r'(?<!\S)(?:addon|module)\s+(\S+)', re.IGNORECASE)
+
+# Task intents in dispatch priority order, each with the phrases that select it
+_INTENT_KEYWORDS = (
+    ("scrape", ('scrape', 'scan', 'list addons', 'get addons', 'find addons')),
+    ("build", ('build protocol', 'create protocol', 'generate protocol', 'control protocol')),
+    ("list", ('show addons', 'list', 'get list', 'all addons')),
+    ("protocols", ('show protocols', 'list protocols', 'get protocols')),
+)
+
+# One compiled alternation per intent: a single C-level scan of the description
+_INTENT_PATTERNS = tuple(
+    (intent, re.compile('|'.join(map(re.escape, keywords))))
+    for intent, keywords in _INTENT_KEYWORDS
+)
+
+# intent -> handler(agent, description)
+_TASK_HANDLERS = {
+    "scrape": lambda agent, description: agent.scrape_addons(),
+    "build": lambda agent, description: agent.build_control_protocols(
+        agent._extract_target_module(description)),
+    "list": lambda agent, description: agent.get_addons_list(),
+    "protocols": lambda agent, description: agent.get_protocols(
+        agent._extract_target_module(description)),
+}
+
+
+class _SafeDict(dict):
+    """format_map mapping that leaves unknown placeholders in place"""
     
-    def get_field_specific_context(self) -> str:
-        return """Common addon management operations:
-- bpy.context.preferences.addons - Access installed addons
-- addon = bpy.context.preferences.addons.get('addon_module')
-- addon.module - Addon module name
-- addon.name - Addon display name
-- bpy.ops.preferences.addon_enable(module='addon_module')
-- bpy.ops.preferences.addon_disable(module='addon_module')
-- bpy.ops.preferences.addon_install(filepath='path/to/addon.py')
-- bpy.ops.preferences.addon_refresh()
-- addon.preferences - Access addon preferences
-- bpy.utils.addon_utils.module_bl_info(module) - Get addon info
+    def __missing__(self, key):
+        return '{' + key + '}'
 
-Addon scraping:
-- Iterate through bpy.context.preferences.addons
-- Extract module, name, description, author, version
-- Check enabled status
-- Get addon location and category
-- Store metadata in database
 
-Control protocol building:
-- Create enable/disable protocols
-- Build configuration protocols
-- Create operation templates
-- Generate code for common addon operations"""
+def _extract_last_json_object(output: str) -> Optional[Dict]:
+    """Decode the last top-level JSON object printed in Blender's output
     
-    def scrape_addons(self) -> Dict:
-        """Scrape all installed addons from Blender"""
-        self.log("Scraping installed addons...")
-        
-        code = """
+    Each decoded object is skipped as a whole, so braces inside it or in
+    its strings never start a new candidate and the scan stays linear.
+    """
+    last = None
+    start = output.find('{')
+    while start != -1:
+        try:
+            data, end = _JSON_DECODER.raw_decode(output, start)
+        except ValueError:
+            end = start + 1
+        else:
+            if isinstance(data, dict):
+                last = data
+        start = output.find('{', end)
+    return last
+
+
+# Injected into Blender: full addon metadata scrape
+_SCRAPE_CODE_FULL = """
+import addon_utils
 import bpy
 import json
-import importlib
+import sys
+
+# bl_info of every addon Blender knows about, from its cached module list
+bl_info_map = {
+    mod.__name__: addon_utils.module_bl_info(mod)
+    for mod in addon_utils.modules(refresh=False)
+}
 
-addons_data = []
+# Stream the result document one addon at a time
+addon_count = 0
+sys.stdout.write('{"status": "success", "addons": [')
 
 # Get all installed addons
 for module_name in bpy.context.preferences.addons.keys():
@@ -147,62 +185,25 @@ for module_name in bpy.context.preferences.addons.keys():
         "category": ""
     }
     
-    # Try to get bl_info from the addon module
-    try:
-        module = importlib.import_module(module_name)
-        if hasattr(module, 'bl_info'):
-            bl_info = module.bl_info
-            addon_info.update({
-                "name": bl_info.get('name', addon_info['name']),
-                "description": bl_info.get('description', ''),
-                "author": bl_info.get('author', ''),
-                "version": str(bl_info.get('version', ())),
-                "category": bl_info.get('category', ''),
-            })
-    except Exception:
-        pass  # If we can't import, just use basic info
+    # Fill in bl_info when Blender has it for this addon
+    bl_info = bl_info_map.get(module_name)
+    if bl_info:
+        addon_info.update({
+            "name": bl_info.get('name') or addon_info['name'],
+            "description": bl_info.get('description', ''),
+            "author": bl_info.get('author', ''),
+            "version": str(bl_info.get('version', ())),
+            "category": bl_info.get('category', ''),
+        })
     
-    addons_data.append(addon_info)
-
-result = {
-    "status": "success",
-    "addons": addons_data,
-    "total_count": len(addons_data),
-    "enabled_count": len(addons_data)
-}
+    sys.stdout.write((', ' if addon_count else '') + json.dumps(addon_info))
+    addon_count += 1
 
-print(json.dumps(result))
+sys.stdout.write('], "total_count": %d, "enabled_count": %d}\\n' % (addon_count, addon_count))
 """
-        
-        result = self.execute_code(code)
-        
-        if result.get("status") == "success":
-            # Parse the result
-            try:
-                output = result.get("output", "")
-                if output:
-                    # Try to extract JSON from output
-                    import re
-                    json_match = re.search(r'\{.*\}', output, re.DOTALL)
-                    if json_match:
-                        addons_data = json.loads(json_match.group())
-                        self._store_addons(addons_data.get("addons", []))
-                        return {
-                            "status": "success",
-                            "addons": addons_data.get("addons", []),
-                            "total_count": addons_data.get("total_count", 0),
-                            "enabled_count": addons_data.get("enabled_count", 0),
-                            "message": f"Scraped {addons_data.get('total_count', 0)} addons"
-                        }
-            except Exception as e:
-                self.log(f"Error parsing addon data: {e}", "ERROR")
-        
-        # Fallback: try simpler scraping
-        return self._scrape_addons_simple()
-    
-    def _scrape_addons_simple(self) -> Dict:
-        """Simpler addon scraping method"""
-        code = """
+
+# Injected into Blender: module/name-only fallback scrape
+_SCRAPE_CODE_SIMPLE = """
 import bpy
 import json
 
@@ -223,100 +224,10 @@ result = {
 }
 print(json.dumps(result))
 """
-        
-        result = self.execute_code(code)
-        if result.get("status") == "success":
-            try:
-                output = result.get("output", "")
-                import re
-                json_match = re.search(r'\{.*\}', output, re.DOTALL)
-                if json_match:
-                    data = json.loads(json_match.group())
-                    self._store_addons(data.get("addons", []))
-                    return data
-            except Exception as e:
-                self.log(f"Error in simple scraping: {e}", "ERROR")
-        
-        return {"status": "error", "message": "Failed to scrape addons"}
-    
-    def _store_addons(self, addons: List[Dict]):
-        """Store scraped addons in database"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        for addon in addons:
-            module = addon.get("module", "")
-            if not module:
-                continue
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO addons 
-                (module, name, description, author, version, enabled, location, category, 
-                 first_scraped, last_updated, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                module,
-                addon.get("name", ""),
-                addon.get("description", ""),
-                addon.get("author", ""),
-                str(addon.get("version", "")),
-                1 if addon.get("enabled", False) else 0,
-                addon.get("location", ""),
-                addon.get("category", ""),
-                datetime.now().isoformat(),
-                datetime.now().isoformat(),
-                json.dumps(addon)
-            ))
-        
-        conn.commit()
-        conn.close()
-        self.log(f"Stored {len(addons)} addons in database")
-    
-    def build_control_protocols(self, addon_module: Optional[str] = None) -> Dict:
-        """Build control protocols for addons"""
-        self.log("Building control protocols...")
-        
-        # Get addons from database
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        if addon_module:
-            cursor.execute("SELECT * FROM addons WHERE module = ?", (addon_module,))
-        else:
-            cursor.execute("SELECT * FROM addons")
-        
-        addons = cursor.fetchall()
-        conn.close()
-        
-        protocols_created = []
-        
-        for addon_row in addons:
-            module = addon_row[1]  # module is at index 1
-            name = addon_row[2]  # name is at index 2
-            
-            # Build basic control protocols
-            protocols = self._create_basic_protocols(module, name)
-            
-            for protocol in protocols:
-                self._store_protocol(module, protocol)
-                protocols_created.append(protocol)
-        
-        return {
-            "status": "success",
-            "protocols_created": len(protocols_created),
-            "protocols": protocols_created,
-            "message": f"Created {len(protocols_created)} control protocols"
-        }
-    
-    def _create_basic_protocols(self, module: str, name: str) -> List[Dict]:
-        """Create basic control protocols for an addon"""
-        protocols = []
-        
-        # Enable protocol
-        enable_protocol = {
-            "protocol_name": "enable",
-            "protocol_type": "enable",
-            "code_template": f"""
+
+# Control protocol code templates. They are stored unfilled and formatted with
+# the protocol's parameters at execution time, so literal braces are doubled.
+_ENABLE_TEMPLATE = """
 import bpy
 import json
 try:
@@ -325,18 +236,9 @@ try:
 except Exception as e:
     result = {{"status": "error", "message": str(e)}}
 print(json.dumps(result))
-""",
-            "parameters": json.dumps({"module": module}),
-            "description": f"Enable addon {name}",
-            "created_at": datetime.now().isoformat()
-        }
-        protocols.append(enable_protocol)
-        
-        # Disable protocol
-        disable_protocol = {
-            "protocol_name": "disable",
-            "protocol_type": "disable",
-            "code_template": f"""
+"""
+
+_DISABLE_TEMPLATE = """
 import bpy
 import json
 try:
@@ -345,18 +247,9 @@ try:
 except Exception as e:
     result = {{"status": "error", "message": str(e)}}
 print(json.dumps(result))
-""",
-            "parameters": json.dumps({"module": module}),
-            "description": f"Disable addon {name}",
-            "created_at": datetime.now().isoformat()
-        }
-        protocols.append(disable_protocol)
-        
-        # Get status protocol
-        status_protocol = {
-            "protocol_name": "get_status",
-            "protocol_type": "query",
-            "code_template": f"""
+"""
+
+_STATUS_TEMPLATE = """
 import bpy
 import json
 try:
@@ -377,18 +270,9 @@ try:
 except Exception as e:
     result = {{"status": "error", "message": str(e)}}
 print(json.dumps(result))
-""",
-            "parameters": json.dumps({"module": module}),
-            "description": f"Get status of addon {name}",
-            "created_at": datetime.now().isoformat()
-        }
-        protocols.append(status_protocol)
-        
-        # Refresh protocol
-        refresh_protocol = {
-            "protocol_name": "refresh",
-            "protocol_type": "refresh",
-            "code_template": f"""
+"""
+
+_REFRESH_TEMPLATE = """
 import bpy
 import json
 try:
@@ -397,53 +281,244 @@ try:
 except Exception as e:
     result = {{"status": "error", "message": str(e)}}
 print(json.dumps(result))
-""",
-            "parameters": json.dumps({}),
-            "description": "Refresh addon list",
-            "created_at": datetime.now().isoformat()
-        }
-        protocols.append(refresh_protocol)
+"""
+
+# (protocol_name, protocol_type, code_template, description, takes addon parameters)
+_PROTOCOL_TEMPLATES = (
+    ("enable", "enable", _ENABLE_TEMPLATE, "Enable addon {name}", True),
+    ("disable", "disable", _DISABLE_TEMPLATE, "Disable addon {name}", True),
+    ("get_status", "query", _STATUS_TEMPLATE, "Get status of addon {name}", True),
+    ("refresh", "refresh", _REFRESH_TEMPLATE, "Refresh addon list", False),
+)
+
+
+class AddonManagerSpecialist(BaseBlenderSpecialist):
+    """Specialist for managing Blender addons - scraping and control protocols"""
+    
+    def __init__(self, **kwargs):
+        super().__init__("AddonManager", **kwargs)
+        self.addons_db_path = "addons_data.db"
+        self.conn = None
+        self._db_lock = threading.Lock()
+        self._init_addons_database()
+        self.addons_cache = {}
+        self.control_protocols = {}  # (addon_module, protocol_name) -> (code_template, parameters)
+        self._pending_stats = {}  # (addon_module, protocol_name) -> [usage, successes, last_used]
+    
+    def _init_addons_database(self):
+        """Initialize database for storing addon information"""
+        # Writes take the database lock up front (BEGIN IMMEDIATE) so a
+        # transaction never has to upgrade from a read lock mid-way
+        self.conn = sqlite3.connect(self.addons_db_path, check_same_thread=False,
+                                    isolation_level="IMMEDIATE")
+        self.conn.row_factory = sqlite3.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            self.conn.execute(pragma)
+        self.conn.executescript(_SCHEMA_SQL)
+    
+    def get_system_prompt(self) -> str:
+        return """You are a Blender Addon Manager expert specializing in:
+- Scraping and cataloging installed Blender addons
+- Extracting addon metadata (name, version, author, description)
+- Building control protocols for addon management
+- Enabling/disabling addons programmatically
+- Configuring addon preferences
+- Managing addon dependencies
+- Creating addon operation templates
+- Monitoring addon status and changes
+
+Generate Python code for addon management operations.
+Return ONLY the code without explanations."""
+    
+    def get_field_specific_context(self) -> str:
+        return """Common addon management operations:
+- bpy.context.preferences.addons - Access installed addons
+- addon = bpy.context.preferences.addons.get('addon_module')
+- addon.module - Addon module name
+- addon.name - Addon display name
+- bpy.ops.preferences.addon_enable(module='addon_module')
+- bpy.ops.preferences.addon_disable(module='addon_module')
+- bpy.ops.preferences.addon_install(filepath='path/to/addon.py')
+- bpy.ops.preferences.addon_refresh()
+- addon.preferences - Access addon preferences
+- bpy.utils.addon_utils.module_bl_info(module) - Get addon info
+
+Addon scraping:
+- Iterate through bpy.context.preferences.addons
+- Extract module, name, description, author, version
+- Check enabled status
+- Get addon location and category
+- Store metadata in database
+
+Control protocol building:
+- Create enable/disable protocols
+- Build configuration protocols
+- Create operation templates
+- Generate code for common addon operations"""
+    
+    def scrape_addons(self) -> Dict:
+        """Scrape all installed addons from Blender"""
+        self.log("Scraping installed addons...")
+        
+        addons_data = self._parse_and_store(self.execute_code(_SCRAPE_CODE_FULL))
+        if addons_data:
+            return {
+                "status": "success",
+                "addons": addons_data.get("addons", []),
+                "total_count": addons_data.get("total_count", 0),
+                "enabled_count": addons_data.get("enabled_count", 0),
+                "message": f"Scraped {addons_data.get('total_count', 0)} addons"
+            }
+        
+        # Fallback: try simpler scraping
+        return self._scrape_addons_simple()
+    
+    def _scrape_addons_simple(self) -> Dict:
+        """Simpler addon scraping method"""
+        data = self._parse_and_store(self.execute_code(_SCRAPE_CODE_SIMPLE))
+        return data or {"status": "error", "message": "Failed to scrape addons"}
+    
+    def _parse_and_store(self, result: Dict) -> Optional[Dict]:
+        """Parse a scraper's output and store its addons; None if it yielded nothing"""
+        if result.get("status") != "success":
+            return None
+        data = _extract_last_json_object(result.get("output", ""))
+        if not data:
+            return None
+        try:
+            self._store_addons(data.get("addons", []))
+        except Exception as e:
+            self.log(f"Error storing scraped addons: {e}", "ERROR")
+            return None
+        return data
+    
+    def _store_addons(self, addons: List[Dict]):
+        """Store scraped addons in database"""
+        now = datetime.now().isoformat()
+        rows = [
+            (
+                addon["module"],
+                addon.get("name", ""),
+                addon.get("description", ""),
+                addon.get("author", ""),
+                str(addon.get("version", "")),
+                1 if addon.get("enabled", False) else 0,
+                addon.get("location", ""),
+                addon.get("category", ""),
+                now,
+                now,
+                json.dumps({k: v for k, v in addon.items() if k not in _STORED_COLS},
+                           separators=(',', ':'))
+            )
+            for addon in addons if addon.get("module")
+        ]
         
-        return protocols
+        with self._db_lock, self.conn:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO addons 
+                (module, name, description, author, version, enabled, location, category, 
+                 first_scraped, last_updated, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        self.log(f"Stored {len(rows)} addons in database")
     
-    def _store_protocol(self, addon_module: str, protocol: Dict):
-        """Store a control protocol in database"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
+    def build_control_protocols(self, addon_module: Optional[str] = None) -> Dict:
+        """Build control protocols for addons"""
+        self.log("Building control protocols...")
+        
+        protocols_created = []
+        now = datetime.now().isoformat()
         
-        cursor.execute("""
-            INSERT OR REPLACE INTO control_protocols
-            (addon_module, protocol_name, protocol_type, code_template, parameters, 
-             description, created_at, last_used, usage_count, success_count)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            addon_module,
-            protocol["protocol_name"],
-            protocol["protocol_type"],
-            protocol["code_template"],
-            protocol.get("parameters", "{}"),
-            protocol.get("description", ""),
-            protocol.get("created_at", datetime.now().isoformat()),
-            None,
-            0,
-            0
-        ))
+        # Stream addons from the database
+        with self._db_lock:
+            cursor = self.conn.cursor()
+            if addon_module:
+                cursor.execute("SELECT module, name FROM addons WHERE module = ?", (addon_module,))
+            else:
+                cursor.execute("SELECT module, name FROM addons")
+            
+            for module, name in cursor:
+                # Build basic control protocols
+                for protocol in self._create_basic_protocols(module, name, now):
+                    protocol["addon_module"] = module
+                    protocols_created.append(protocol)
         
-        conn.commit()
-        conn.close()
+        self._store_protocols_bulk(protocols_created, now)
+        
+        return {
+            "status": "success",
+            "protocols_created": len(protocols_created),
+            "protocols": protocols_created,
+            "message": f"Created {len(protocols_created)} control protocols"
+        }
+    
+    def _create_basic_protocols(self, module: str, name: str,
+                                now: Optional[str] = None) -> List[Dict]:
+        """Create basic control protocols for an addon"""
+        now = now or datetime.now().isoformat()
+        addon_params = json.dumps({"module": module, "name": name})
+        return [
+            {
+                "protocol_name": protocol_name,
+                "protocol_type": protocol_type,
+                "code_template": code_template,
+                "parameters": addon_params if takes_addon else "{}",
+                "description": description.format(name=name),
+                "created_at": now
+            }
+            for protocol_name, protocol_type, code_template, description, takes_addon
+            in _PROTOCOL_TEMPLATES
+        ]
+    
+    def _store_protocols_bulk(self, protocols: List[Dict], now: Optional[str] = None):
+        """Store control protocols in database (each carries its addon_module)
+        
+        Rebuilding an existing protocol refreshes its code but keeps its usage stats.
+        """
+        now = now or datetime.now().isoformat()
+        rows = [
+            (
+                protocol["addon_module"],
+                protocol["protocol_name"],
+                protocol["protocol_type"],
+                protocol["code_template"],
+                protocol.get("parameters", "{}"),
+                protocol.get("description", ""),
+                protocol.get("created_at", now),
+                None,
+                0,
+                0
+            )
+            for protocol in protocols
+        ]
+        
+        with self._db_lock, self.conn:
+            self.conn.executemany("""
+                INSERT INTO control_protocols
+                (addon_module, protocol_name, protocol_type, code_template, parameters, 
+                 description, created_at, last_used, usage_count, success_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(addon_module, protocol_name) DO UPDATE SET
+                    protocol_type = excluded.protocol_type,
+                    code_template = excluded.code_template,
+                    parameters = excluded.parameters,
+                    description = excluded.description
+            """, rows)
+            for row in rows:
+                self.control_protocols.pop((row[0], row[1]), None)
     
     def execute_protocol(self, addon_module: str, protocol_name: str, params: Optional[Dict] = None) -> Dict:
         """Execute a control protocol for an addon"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT code_template, parameters FROM control_protocols
-            WHERE addon_module = ? AND protocol_name = ?
-        """, (addon_module, protocol_name))
-        
-        protocol = cursor.fetchone()
-        conn.close()
+        key = (addon_module, protocol_name)
+        protocol = self.control_protocols.get(key)
+        if protocol is None:
+            with self._db_lock:
+                protocol = self.conn.execute("""
+                    SELECT code_template, parameters FROM control_protocols
+                    WHERE addon_module = ? AND protocol_name = ?
+                """, key).fetchone()
+            if protocol:
+                self.control_protocols[key] = protocol
         
         if not protocol:
             return {
@@ -458,10 +533,12 @@ print(json.dumps(result))
         if params:
             stored_params.update(params)
         
-        # Replace parameters in code template
-        code = code_template
-        for key, value in stored_params.items():
-            code = code.replace(f"{{{key}}}", str(value))
+        # Fill the template's placeholders in a single formatting pass
+        try:
+            code = code_template.format_map(_SafeDict(stored_params))
+        except ValueError:
+            # Protocols stored before templates were kept unfilled are already code
+            code = code_template
         
         # Execute the protocol
         result = self.execute_code(code)
@@ -472,44 +549,47 @@ print(json.dumps(result))
         return result
     
     def _update_protocol_stats(self, addon_module: str, protocol_name: str, success: bool):
-        """Update protocol usage statistics"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            UPDATE control_protocols
-            SET last_used = ?, usage_count = usage_count + 1,
-                success_count = success_count + ?
-            WHERE addon_module = ? AND protocol_name = ?
-        """, (datetime.now().isoformat(), 1 if success else 0, addon_module, protocol_name))
-        
-        conn.commit()
-        conn.close()
+        """Record protocol usage; written to the database by _flush_protocol_stats"""
+        now = datetime.now().isoformat()
+        with self._db_lock:
+            slot = self._pending_stats.setdefault((addon_module, protocol_name), [0, 0, None])
+            slot[0] += 1
+            slot[1] += 1 if success else 0
+            slot[2] = now
+            if len(self._pending_stats) < _STATS_FLUSH_THRESHOLD:
+                return
+        self._flush_protocol_stats()
+    
+    def _flush_protocol_stats(self):
+        """Write buffered protocol usage statistics in one transaction"""
+        with self._db_lock:
+            if not self._pending_stats:
+                return
+            rows = [
+                (last_used, usage, successes, addon_module, protocol_name)
+                for (addon_module, protocol_name), (usage, successes, last_used)
+                in self._pending_stats.items()
+            ]
+            self._pending_stats.clear()
+            with self.conn:
+                self.conn.executemany("""
+                    UPDATE control_protocols
+                    SET last_used = ?, usage_count = usage_count + ?,
+                        success_count = success_count + ?
+                    WHERE addon_module = ? AND protocol_name = ?
+                """, rows)
     
     def get_addons_list(self) -> Dict:
         """Get list of all scraped addons"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT module, name, enabled, description, author, version, category
-            FROM addons
-            ORDER BY name
-        """)
-        
-        addons = []
-        for row in cursor.fetchall():
-            addons.append({
-                "module": row[0],
-                "name": row[1],
-                "enabled": bool(row[2]),
-                "description": row[2],
-                "author": row[4],
-                "version": row[5],
-                "category": row[6]
-            })
+        with self._db_lock:
+            addons = [dict(row) for row in self.conn.execute("""
+                SELECT module, name, enabled, description, author, version, category
+                FROM addons
+                ORDER BY name
+            """)]
         
-        conn.close()
+        for addon in addons:
+            addon["enabled"] = bool(addon["enabled"])
         
         return {
             "status": "success",
@@ -519,37 +599,26 @@ print(json.dumps(result))
     
     def get_protocols(self, addon_module: Optional[str] = None) -> Dict:
         """Get control protocols"""
-        conn = sqlite3.connect(self.addons_db_path)
-        cursor = conn.cursor()
-        
-        if addon_module:
-            cursor.execute("""
-                SELECT addon_module, protocol_name, protocol_type, description, 
-                       usage_count, success_count
-                FROM control_protocols
-                WHERE addon_module = ?
-                ORDER BY protocol_name
-            """, (addon_module,))
-        else:
-            cursor.execute("""
-                SELECT addon_module, protocol_name, protocol_type, description,
-                       usage_count, success_count
-                FROM control_protocols
-                ORDER BY addon_module, protocol_name
-            """)
-        
-        protocols = []
-        for row in cursor.fetchall():
-            protocols.append({
-                "addon_module": row[0],
-                "protocol_name": row[1],
-                "protocol_type": row[2],
-                "description": row[3],
-                "usage_count": row[4],
-                "success_count": row[5]
-            })
+        self._flush_protocol_stats()
         
-        conn.close()
+        with self._db_lock:
+            cursor = self.conn.cursor()
+            if addon_module:
+                cursor.execute("""
+                    SELECT addon_module, protocol_name, protocol_type, description, 
+                           usage_count, success_count
+                    FROM control_protocols
+                    WHERE addon_module = ?
+                    ORDER BY protocol_name
+                """, (addon_module,))
+            else:
+                cursor.execute("""
+                    SELECT addon_module, protocol_name, protocol_type, description,
+                           usage_count, success_count
+                    FROM control_protocols
+                    ORDER BY addon_module, protocol_name
+                """)
+            protocols = [dict(row) for row in cursor]
         
         return {
             "status": "success",
@@ -562,39 +631,12 @@ print(json.dumps(result))
         self.log(f"AddonManager executing: {description}")
         
         description_lower = description.lower()
+        intent = next((name for name, pattern in _INTENT_PATTERNS
+                       if pattern.search(description_lower)), None)
         
-        # Scrape addons
-        if any(keyword in description_lower for keyword in 
-               ['scrape', 'scan', 'list addons', 'get addons', 'find addons']):
-            return self.scrape_addons()
-        
-        # Build protocols
-        if any(keyword in description_lower for keyword in 
-               ['build protocol', 'create protocol', 'generate protocol', 'control protocol']):
-            # Try to extract addon module from description
-            addon_module = None
-            words = description.split()
-            for i, word in enumerate(words):
-                if word.lower() in ['for', 'addon', 'module'] and i + 1 < len(words):
-                    addon_module = words[i + 1]
-                    break
-            return self.build_control_protocols(addon_module)
-        
-        # Get addons list
-        if any(keyword in description_lower for keyword in 
-               ['show addons', 'list', 'get list', 'all addons']):
-            return self.get_addons_list()
-        
-        # Get protocols
-        if any(keyword in description_lower for keyword in 
-               ['show protocols', 'list protocols', 'get protocols']):
-            addon_module = None
-            words = description.split()
-            for i, word in enumerate(words):
-                if word.lower() in ['for', 'addon', 'module'] and i + 1 < len(words):
-                    addon_module = words[i + 1]
-                    break
-            return self.get_protocols(addon_module)
+        # Scrape, build protocols, list addons or list protocols
+        if intent:
+            return _TASK_HANDLERS[intent](self, description)
         
         # Enable addon
         if 'enable' in description_lower and 'addon' in description_lower:
@@ -625,16 +667,23 @@ print(json.dumps(result))
     def _extract_addon_module(self, description: str) -> Optional[str]:
         """Extract addon module name from description"""
         # Try to find quoted strings
-        import re
-        quoted = re.findall(r'["\']([^"\']+)["\']', description)
+        quoted = _QUOTED_RE.search(description)
         if quoted:
-            return quoted[0]
+            return quoted.group(1)
         
         # Try to find after keywords
-        words = description.split()
-        for i, word in enumerate(words):
-            if word.lower() in ['addon', 'module'] and i + 1 < len(words):
-                return words[i + 1]
-        
-        return None
-
+        match = _ADDON_WORD_RE.search(description)
+        return match.group(1) if match else None
+    
+    def _extract_target_module(self, description: str) -> Optional[str]:
+        """Extract the word following 'for', 'addon' or 'module'"""
+        match = _TARGET_WORD_RE.search(description)
+        return match.group(1) if match else None
+    
+    def cleanup(self):
+        """Clean up resources"""
+        super().cleanup()
+        if self.conn:
+            self._flush_protocol_stats()
+            self.conn.close()
+            self.conn = None
@@ -4,14 +4,29 @@ Tracks all agent activities, operations, and status for viewport visualization
 """
 
 import json
+import logging
+import sys
 import threading
 import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from collections import deque
-from dataclasses import dataclass, asdict
+from copy import deepcopy
+from dataclasses import dataclass, field
 from enum import Enum
 
+try:
+    import orjson
+
+    # Results and metadata may carry sets, numpy scalars or non-str keys
+    def _dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:  # orjson is optional; the stdlib codec produces the same data
+    def _dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(obj, default=str).encode()
+
+logger = logging.getLogger(__name__)
+
 
 class ActivityStatus(Enum):
     """Status of an agent activity"""
@@ -25,9 +40,27 @@ class ActivityStatus(Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+# Plain string values of the statuses the tracker sets itself
+_STATUS_IDLE = ActivityStatus.IDLE.value
+_STATUS_STARTING = ActivityStatus.STARTING.value
+_STATUS_SUCCESS = ActivityStatus.SUCCESS.value
+_STATUS_ERROR = ActivityStatus.ERROR.value
+_STATUS_CANCELLED = ActivityStatus.CANCELLED.value
+
+# Statuses after which an activity no longer counts as active
+FINISHED_STATUSES = frozenset({_STATUS_SUCCESS, _STATUS_ERROR, _STATUS_CANCELLED})
+
+# Number of AgentActivity objects pre-allocated and recycled by the tracker
+ACTIVITY_POOL_SIZE = 4096
+
+
+@dataclass(slots=True)
 class AgentActivity:
-    """Represents a single agent activity"""
+    """Represents a single agent activity
+
+    ``to_dict`` caches its result; anything that mutates a field (including
+    ``metadata`` in place) must set ``_dirty`` so the next call rebuilds it.
+    """
     agent_name: str
     activity_id: str
     status: str
@@ -39,19 +72,59 @@ class AgentActivity:
     error_message: Optional[str] = None
     result: Optional[Dict] = None
     metadata: Optional[Dict] = None
+    _dirty: bool = field(default=True, init=False, repr=False, compare=False)
+    _cached: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
 
     def to_dict(self) -> Dict:
         """Convert to dictionary"""
-        data = asdict(self)
-        data['duration'] = (
-            (self.end_time or time.time()) - self.start_time
-        ) if self.end_time or self.start_time else 0
-        return data
+        if self._dirty or self._cached is None:
+            self._cached = {
+                'agent_name': self.agent_name,
+                'activity_id': self.activity_id,
+                'status': self.status,
+                'task_description': self.task_description,
+                'start_time': self.start_time,
+                'end_time': self.end_time,
+                'progress': self.progress,
+                'current_step': self.current_step,
+                'error_message': self.error_message,
+                'result': deepcopy(self.result),
+                'metadata': deepcopy(self.metadata),
+                'duration': (
+                    (self.end_time or time.time()) - self.start_time
+                ) if self.end_time or self.start_time else 0,
+            }
+            self._dirty = False
+        elif self.end_time is None and self.start_time:
+            # Still running: only the duration has moved on
+            return dict(self._cached, duration=time.time() - self.start_time)
+        return self._cached
 
+    def reset(self, agent_name: str, activity_id: str, status: str,
+              task_description: str, start_time: float,
+              metadata: Optional[Dict] = None):
+        """Overwrite every field in place so a pooled object can be reused"""
+        self.agent_name = agent_name
+        self.activity_id = activity_id
+        self.status = status
+        self.task_description = task_description
+        self.start_time = start_time
+        self.end_time = None
+        self.progress = 0.0
+        self.current_step = ""
+        self.error_message = None
+        self.result = None
+        self.metadata = metadata
+        self._dirty = True
+        self._cached = None
 
-@dataclass
+
+@dataclass(slots=True)
 class AgentStatus:
-    """Current status of an agent"""
+    """Current status of an agent
+
+    Same caching contract as ``AgentActivity.to_dict``.
+    """
     agent_name: str
     status: str
     current_activity_id: Optional[str] = None
@@ -60,14 +133,37 @@ class AgentStatus:
     failed_operations: int = 0
     last_activity_time: Optional[float] = None
     is_active: bool = False
+    # Ids of this agent's unfinished activities; not part of to_dict
+    active_activity_ids: set = field(default_factory=set, repr=False, compare=False)
+    _dirty: bool = field(default=True, init=False, repr=False, compare=False)
+    _cached: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
 
     def to_dict(self) -> Dict:
         """Convert to dictionary"""
-        return asdict(self)
+        if self._dirty or self._cached is None:
+            self._cached = {
+                'agent_name': self.agent_name,
+                'status': self.status,
+                'current_activity_id': self.current_activity_id,
+                'total_operations': self.total_operations,
+                'successful_operations': self.successful_operations,
+                'failed_operations': self.failed_operations,
+                'last_activity_time': self.last_activity_time,
+                'is_active': self.is_active,
+            }
+            self._dirty = False
+        return self._cached
 
 
 class AgentActivityTracker:
-    """Singleton tracker for all agent activities"""
+    """Singleton tracker for all agent activities
+
+    Writers lock only the shard of the agent they touch; the registry lock
+    guards the shared dicts and is always taken after an agent lock, never
+    before.  Every mutation republishes its serialized dicts into
+    copy-on-write snapshots, which the read-only getters return without
+    taking any lock.
+    """
     
     _instance = None
     _lock = threading.Lock()
@@ -86,57 +182,201 @@ class AgentActivityTracker:
         
         self.activities: Dict[str, AgentActivity] = {}
         self.agent_statuses: Dict[str, AgentStatus] = {}
-        self.activity_history: deque = deque(maxlen=1000)  # Keep last 1000 activities
+        # Last 1000 completed activities as (dict, serialized JSON bytes) pairs
+        self.activity_history: deque = deque(maxlen=1000)
         self.subscribers: List[callable] = []
-        self.lock = threading.Lock()
+        # Immutable copy of subscribers, rebuilt on (un)subscribe, read lock-free
+        self._subscribers_tuple: tuple = ()
+        self._registry_lock = threading.RLock()
+        self._agent_locks: Dict[str, threading.RLock] = {}
+        # Per-agent activity shards, guarded by the matching agent lock
+        self._agent_activities: Dict[str, Dict[str, AgentActivity]] = {}
+        # Read-only snapshots, replaced wholesale (never mutated in place)
+        self._activity_snapshot: Dict[str, Dict] = {}
+        self._status_snapshot: Dict[str, Dict] = {}
+        self._history_snapshot: tuple = ()
+        # Coalescing queue of events for batched consumers (see drain_updates)
+        self._pending: deque = deque(maxlen=1000)
+        self._pending_event = threading.Event()
+        self._has_batch_consumer = False
+        # Running totals behind get_stats, guarded by the registry lock
+        self._global_total = 0
+        self._global_success = 0
+        self._global_failed = 0
+        self._active_count = 0
+        self._active_agents = 0
+        # Signalled on every state change (see wait_for_change)
+        self._cv = threading.Condition()
+        # Pool of reusable activities: free slots, live id -> slot, and the
+        # completion order used to evict the oldest finished activity
+        self._slots: List[AgentActivity] = [
+            AgentActivity("", "", _STATUS_IDLE, "", 0.0)
+            for _ in range(ACTIVITY_POOL_SIZE)
+        ]
+        self._free: deque = deque(range(ACTIVITY_POOL_SIZE))
+        self._id_to_slot: Dict[str, int] = {}
+        self._completed_order: deque = deque()
+        # agent_name -> id of its most recently started activity
+        self._latest_activity_by_agent: Dict[str, str] = {}
         self._initialized = True
     
+    def _agent_lock(self, agent_name: str) -> threading.RLock:
+        """Return the agent's shard lock, registering the agent if needed"""
+        lock = self._agent_locks.get(agent_name)
+        if lock is None:
+            self.register_agent(agent_name)
+            lock = self._agent_locks[agent_name]
+        return lock
+    
+    def _acquire_activity(self, activity_id: str) -> AgentActivity:
+        """Take a pooled activity for ``activity_id``, evicting if the pool is full"""
+        while True:
+            with self._registry_lock:
+                slot = self._id_to_slot.get(activity_id)
+                if slot is not None:
+                    # A restarted id is running again and must not be evicted
+                    try:
+                        self._completed_order.remove(activity_id)
+                    except ValueError:
+                        pass
+                elif self._free:
+                    slot = self._free.popleft()
+                    self._id_to_slot[activity_id] = slot
+                if slot is not None:
+                    return self._slots[slot]
+                # Evict the oldest finished activity; heap overflow activities
+                # are evicted too, but only a pooled one frees a slot to retry
+                victim = None
+                while self._completed_order and victim is None:
+                    candidate = self._completed_order.popleft()
+                    activity = self.activities.get(candidate)
+                    if activity is not None and activity.status in FINISHED_STATUSES:
+                        victim = (activity.agent_name, candidate)
+            if victim is None:
+                # Every pooled activity is still running; fall back to the heap
+                return AgentActivity("", "", _STATUS_IDLE, "", 0.0)
+            agent_name, victim_id = victim
+            with self._agent_locks[agent_name]:
+                # Re-check under the shard lock in case the id was restarted
+                activity = self.activities.get(victim_id)
+                if activity is not None and activity.status in FINISHED_STATUSES:
+                    self._release_activities(agent_name, [victim_id])
+    
+    def _release_activities(self, agent_name: str, activity_ids: List[str]):
+        """Drop finished activities and return their slots to the pool"""
+        with self._agent_locks[agent_name]:
+            shard = self._agent_activities[agent_name]
+            with self._registry_lock:
+                snapshot = dict(self._activity_snapshot)
+                for activity_id in activity_ids:
+                    shard.pop(activity_id, None)
+                    self.activities.pop(activity_id, None)
+                    snapshot.pop(activity_id, None)
+                    slot = self._id_to_slot.pop(activity_id, None)
+                    if slot is not None:
+                        self._free.append(slot)
+                self._activity_snapshot = snapshot
+    
+    def _set_active(self, status: AgentStatus, activity_id: str, active: bool):
+        """Add or drop an id from the agent's active set, keeping the count"""
+        ids = status.active_activity_ids
+        if active == (activity_id in ids):
+            return
+        with self._registry_lock:
+            if active:
+                ids.add(activity_id)
+                self._active_count += 1
+            else:
+                ids.discard(activity_id)
+                self._active_count -= 1
+    
+    def _publish_activity(self, activity: AgentActivity) -> Dict:
+        """Serialize an activity and swap it into the activity snapshot"""
+        data = activity.to_dict()
+        with self._registry_lock:
+            snapshot = dict(self._activity_snapshot)
+            snapshot[activity.activity_id] = data
+            self._activity_snapshot = snapshot
+        return data
+    
+    def _publish_status(self, status: AgentStatus):
+        """Serialize an agent status and swap it into the status snapshot"""
+        data = status.to_dict()
+        with self._registry_lock:
+            snapshot = dict(self._status_snapshot)
+            snapshot[status.agent_name] = data
+            self._status_snapshot = snapshot
+    
+    @staticmethod
+    def _live(data: Dict, now: float) -> Dict:
+        """Refresh the duration of a snapshot entry that is still running"""
+        if data.get('end_time'):
+            return data
+        return dict(data, duration=now - data['start_time'])
+    
     def register_agent(self, agent_name: str):
         """Register an agent with the tracker"""
-        with self.lock:
-            if agent_name not in self.agent_statuses:
-                self.agent_statuses[agent_name] = AgentStatus(
-                    agent_name=agent_name,
-                    status=ActivityStatus.IDLE.value,
-                    is_active=False
-                )
-                self._notify_subscribers({
-                    "type": "agent_registered",
-                    "agent_name": agent_name
-                })
+        agent_name = sys.intern(agent_name)
+        with self._registry_lock:
+            if agent_name in self.agent_statuses:
+                return
+            status = AgentStatus(
+                agent_name=agent_name,
+                status=_STATUS_IDLE,
+                is_active=False
+            )
+            self.agent_statuses[agent_name] = status
+            self._agent_activities[agent_name] = {}
+            self._agent_locks[agent_name] = threading.RLock()
+            self._publish_status(status)
+        
+        self._notify_subscribers({
+            "type": "agent_registered",
+            "agent_name": agent_name
+        })
     
     def start_activity(self, agent_name: str, task_description: str, 
                       activity_id: Optional[str] = None,
                       metadata: Optional[Dict] = None) -> str:
         """Start tracking a new activity"""
+        agent_name = sys.intern(agent_name)
         if activity_id is None:
             activity_id = f"{agent_name}_{int(time.time() * 1000)}"
         
-        activity = AgentActivity(
-            agent_name=agent_name,
-            activity_id=activity_id,
-            status=ActivityStatus.STARTING.value,
-            task_description=task_description,
-            start_time=time.time(),
-            metadata=metadata or {}
-        )
+        activity = self._acquire_activity(activity_id)
         
-        with self.lock:
-            self.activities[activity_id] = activity
+        with self._agent_lock(agent_name):
+            activity.reset(
+                agent_name=agent_name,
+                activity_id=activity_id,
+                status=_STATUS_STARTING,
+                task_description=task_description,
+                start_time=time.time(),
+                metadata={**metadata, "logs": []} if metadata else {"logs": []}
+            )
+            self._agent_activities[agent_name][activity_id] = activity
+            self._latest_activity_by_agent[agent_name] = activity_id
+            with self._registry_lock:
+                self.activities[activity_id] = activity
             
             # Update agent status
-            if agent_name not in self.agent_statuses:
-                self.register_agent(agent_name)
-            
             status = self.agent_statuses[agent_name]
-            status.status = ActivityStatus.STARTING.value
+            status.status = _STATUS_STARTING
             status.current_activity_id = activity_id
+            self._set_active(status, activity_id, True)
+            if not status.is_active:
+                with self._registry_lock:
+                    self._active_agents += 1
             status.is_active = True
             status.last_activity_time = time.time()
+            status._dirty = True
+            
+            data = self._publish_activity(activity)
+            self._publish_status(status)
         
         self._notify_subscribers({
             "type": "activity_started",
-            "activity": activity.to_dict()
+            "activity": data
         })
         
         return activity_id
@@ -146,17 +386,25 @@ class AgentActivityTracker:
                        current_step: Optional[str] = None,
                        metadata: Optional[Dict] = None):
         """Update an activity's status"""
-        with self.lock:
-            if activity_id not in self.activities:
-                return
-            
-            activity = self.activities[activity_id]
-            
+        activity = self.activities.get(activity_id)
+        if activity is None:
+            return
+        if status:
+            status = sys.intern(status)
+        
+        with self._agent_locks[activity.agent_name]:
+            if self.activities.get(activity_id) is not activity:
+                return  # Evicted (and possibly recycled) meanwhile
             if status:
                 activity.status = status
                 # Update agent status
-                if activity.agent_name in self.agent_statuses:
-                    self.agent_statuses[activity.agent_name].status = status
+                agent_status = self.agent_statuses.get(activity.agent_name)
+                if agent_status is not None:
+                    agent_status.status = status
+                    if status in FINISHED_STATUSES:
+                        self._set_active(agent_status, activity_id, False)
+                    agent_status._dirty = True
+                    self._publish_status(agent_status)
             
             if progress is not None:
                 activity.progress = max(0.0, min(1.0, progress))
@@ -169,65 +417,86 @@ class AgentActivityTracker:
                     activity.metadata = {}
                 activity.metadata.update(metadata)
             
-            self._notify_subscribers({
-                "type": "activity_updated",
-                "activity": activity.to_dict()
-            })
+            activity._dirty = True
+            data = self._publish_activity(activity)
+        
+        self._notify_subscribers({
+            "type": "activity_updated",
+            "activity": data
+        })
     
     def complete_activity(self, activity_id: str, success: bool = True,
                          result: Optional[Dict] = None,
                          error_message: Optional[str] = None):
         """Mark an activity as complete"""
-        with self.lock:
-            if activity_id not in self.activities:
-                return
-            
-            activity = self.activities[activity_id]
+        activity = self.activities.get(activity_id)
+        if activity is None:
+            return
+        
+        agent_name = activity.agent_name
+        with self._agent_locks[agent_name]:
+            if self.activities.get(activity_id) is not activity:
+                return  # Evicted (and possibly recycled) meanwhile
             activity.end_time = time.time()
             activity.progress = 1.0
             
             if success:
-                activity.status = ActivityStatus.SUCCESS.value
+                activity.status = _STATUS_SUCCESS
             else:
-                activity.status = ActivityStatus.ERROR.value
+                activity.status = _STATUS_ERROR
                 activity.error_message = error_message
             
             if result:
                 activity.result = result
+            activity._dirty = True
+            # Serialize before any counters move, so a bad result can't
+            # leave the totals counted without a history entry
+            data = activity.to_dict()
+            encoded = _dumps_bytes(data)
             
             # Update agent status
-            agent_name = activity.agent_name
-            if agent_name in self.agent_statuses:
-                status = self.agent_statuses[agent_name]
+            with self._registry_lock:
+                self._global_total += 1
+                if success:
+                    self._global_success += 1
+                else:
+                    self._global_failed += 1
+            
+            status = self.agent_statuses.get(agent_name)
+            if status is not None:
                 status.total_operations += 1
                 if success:
                     status.successful_operations += 1
-                    status.status = ActivityStatus.IDLE.value
+                    status.status = _STATUS_IDLE
                 else:
                     status.failed_operations += 1
-                    status.status = ActivityStatus.ERROR.value
+                    status.status = _STATUS_ERROR
                 
                 # Check if agent has other active activities
-                has_other_active = any(
-                    a.activity_id != activity_id and 
-                    a.status not in [ActivityStatus.SUCCESS.value, ActivityStatus.ERROR.value, ActivityStatus.CANCELLED.value]
-                    for a in self.activities.values()
-                    if a.agent_name == agent_name
-                )
-                
-                if not has_other_active:
+                self._set_active(status, activity_id, False)
+                if not status.active_activity_ids:
+                    if status.is_active:
+                        with self._registry_lock:
+                            self._active_agents -= 1
                     status.is_active = False
                     status.current_activity_id = None
-                    if status.status == ActivityStatus.ERROR.value:
+                    if status.status == _STATUS_ERROR:
                         # Reset to idle after error
-                        status.status = ActivityStatus.IDLE.value
+                        status.status = _STATUS_IDLE
+                status._dirty = True
+                self._publish_status(status)
             
-            # Move to history
-            self.activity_history.append(activity.to_dict())
+            data = self._publish_activity(activity)
+            
+            # Move to history; the pooled object stays live until evicted
+            with self._registry_lock:
+                self._completed_order.append(activity_id)
+                self.activity_history.append((data, encoded))
+                self._history_snapshot = tuple(self.activity_history)
         
         self._notify_subscribers({
             "type": "activity_completed",
-            "activity": activity.to_dict()
+            "activity": data
         })
     
     def log_message(self, agent_name: str, message: str, level: str = "INFO"):
@@ -241,93 +510,148 @@ class AgentActivityTracker:
             "timestamp": timestamp
         }
         
-        with self.lock:
-            # Add to most recent activity if exists
-            for activity in reversed(list(self.activities.values())):
-                if activity.agent_name == agent_name and activity.metadata:
-                    if "logs" not in activity.metadata:
-                        activity.metadata["logs"] = []
-                    activity.metadata["logs"].append({
+        lock = self._agent_locks.get(agent_name)
+        if lock is not None:
+            with lock:
+                # Add to most recent activity if exists
+                activity = self._agent_activities[agent_name].get(
+                    self._latest_activity_by_agent.get(agent_name)
+                )
+                if activity is not None:
+                    activity.metadata.setdefault("logs", []).append({
                         "message": message,
                         "level": level,
                         "timestamp": timestamp
                     })
-                    break
+                    activity._dirty = True
+                    self._publish_activity(activity)
         
         self._notify_subscribers(log_entry)
     
     def get_all_activities(self) -> List[Dict]:
         """Get all current activities"""
-        with self.lock:
-            return [activity.to_dict() for activity in self.activities.values()]
+        now = time.time()
+        return [self._live(data, now) for data in self._activity_snapshot.values()]
     
     def get_agent_activities(self, agent_name: str) -> List[Dict]:
         """Get activities for a specific agent"""
-        with self.lock:
-            return [
-                activity.to_dict()
-                for activity in self.activities.values()
-                if activity.agent_name == agent_name
-            ]
+        now = time.time()
+        return [
+            self._live(data, now)
+            for data in self._activity_snapshot.values()
+            if data['agent_name'] == agent_name
+        ]
     
     def get_all_agent_statuses(self) -> List[Dict]:
         """Get status of all agents"""
-        with self.lock:
-            return [status.to_dict() for status in self.agent_statuses.values()]
+        return list(self._status_snapshot.values())
     
     def get_agent_status(self, agent_name: str) -> Optional[Dict]:
         """Get status of a specific agent"""
-        with self.lock:
-            if agent_name in self.agent_statuses:
-                return self.agent_statuses[agent_name].to_dict()
-            return None
+        return self._status_snapshot.get(agent_name)
     
     def get_activity_history(self, limit: int = 100) -> List[Dict]:
         """Get recent activity history"""
-        with self.lock:
-            return list(self.activity_history)[-limit:]
+        return [data for data, _ in self._history_snapshot[-limit:]]
+    
+    def get_activity_history_json(self, limit: int = 100) -> bytes:
+        """Get recent activity history as a JSON array, from cached fragments"""
+        return b'[' + b','.join(raw for _, raw in self._history_snapshot[-limit:]) + b']'
+    
+    def get_dashboard_json(self) -> bytes:
+        """Get the dashboard payload as JSON, reusing cached history fragments"""
+        return b''.join((
+            b'{"activities":', _dumps_bytes(self.get_all_activities()),
+            b',"agent_statuses":', _dumps_bytes(self.get_all_agent_statuses()),
+            b',"recent_history":', self.get_activity_history_json(50),
+            b',"timestamp":', _dumps_bytes(time.time()),
+            b'}',
+        ))
     
     def get_dashboard_data(self) -> Dict:
         """Get all data for dashboard"""
-        with self.lock:
+        return {
+            "activities": self.get_all_activities(),
+            "agent_statuses": self.get_all_agent_statuses(),
+            "recent_history": self.get_activity_history(50),
+            "timestamp": time.time()
+        }
+    
+    def get_stats(self) -> Dict:
+        """Get overall statistics from the running totals"""
+        with self._registry_lock:
+            total = self._global_total
+            successful = self._global_success
             return {
-                "activities": [activity.to_dict() for activity in self.activities.values()],
-                "agent_statuses": [status.to_dict() for status in self.agent_statuses.values()],
-                "recent_history": list(self.activity_history)[-50:],
-                "timestamp": time.time()
+                "total_agents": len(self.agent_statuses),
+                "active_agents": self._active_agents,
+                "total_operations": total,
+                "successful_operations": successful,
+                "failed_operations": self._global_failed,
+                "active_activities": self._active_count,
+                "success_rate": (
+                    successful / total * 100
+                    if total > 0 else 0
+                )
             }
     
     def subscribe(self, callback: callable):
         """Subscribe to activity updates"""
-        with self.lock:
+        with self._registry_lock:
             if callback not in self.subscribers:
                 self.subscribers.append(callback)
+                self._subscribers_tuple = tuple(self.subscribers)
     
     def unsubscribe(self, callback: callable):
         """Unsubscribe from activity updates"""
-        with self.lock:
+        with self._registry_lock:
             if callback in self.subscribers:
                 self.subscribers.remove(callback)
+                self._subscribers_tuple = tuple(self.subscribers)
+    
+    def drain_updates(self, timeout: float = 0.05) -> List[Dict]:
+        """Wait up to ``timeout`` seconds for events and return all pending ones"""
+        self._has_batch_consumer = True
+        self._pending_event.wait(timeout)
+        self._pending_event.clear()
+        pending = self._pending
+        return [pending.popleft() for _ in range(len(pending))]
+    
+    def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """Block until the tracker state changes; False if ``timeout`` expired"""
+        with self._cv:
+            return self._cv.wait(timeout)
     
     def _notify_subscribers(self, data: Dict):
-        """Notify all subscribers of an update"""
-        for callback in self.subscribers:
+        """Queue an update for batched consumers and notify all subscribers"""
+        with self._cv:
+            self._cv.notify_all()
+        if self._has_batch_consumer:
+            self._pending.append(data)
+            self._pending_event.set()
+        subscribers = self._subscribers_tuple
+        if not subscribers:
+            return
+        for callback in subscribers:
             try:
                 callback(data)
-            except Exception as e:
-                print(f"Error notifying subscriber: {e}", flush=True)
+            except Exception:
+                logger.exception("Error notifying subscriber")
     
     def clear_completed_activities(self, older_than_seconds: int = 3600):
         """Clear completed activities older than specified time"""
         current_time = time.time()
-        with self.lock:
-            to_remove = [
-                activity_id
-                for activity_id, activity in self.activities.items()
-                if activity.end_time and (current_time - activity.end_time) > older_than_seconds
-            ]
-            for activity_id in to_remove:
-                del self.activities[activity_id]
+        with self._registry_lock:
+            agent_locks = list(self._agent_locks.items())
+        for agent_name, lock in agent_locks:
+            with lock:
+                to_remove = [
+                    activity_id
+                    for activity_id, activity in self._agent_activities[agent_name].items()
+                    if activity.end_time and (current_time - activity.end_time) > older_than_seconds
+                ]
+                if to_remove:
+                    self._release_activities(agent_name, to_remove)
 
 
 # Global singleton instance
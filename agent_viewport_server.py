@@ -4,27 +4,94 @@ Flask server with WebSocket support for real-time agent activity visualization
 """
 
 import json
+import logging
+import logging.handlers
 import threading
 import time
-from flask import Flask, render_template, jsonify, request
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, render_template, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from agent_activity_tracker import tracker
 import sys
 from typing import Dict, Any
 
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
 
-app = Flask(__name__, template_folder='templates', static_folder='static')
-app.config['SECRET_KEY'] = 'agent-viewport-secret-key'
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson"""
+
+        def dumps(self, obj: Any, **kwargs: Any) -> str:
+            return orjson.dumps(obj, default=self.default, option=_ORJSON_OPTIONS).decode()
+
+        def loads(self, s, **kwargs: Any) -> Any:
+            return orjson.loads(s)
 
-# Track connected clients
-connected_clients = set()
+    class _OrjsonSocketIOAdapter:
+        """json-module stand-in for python-socketio packet encoding"""
 
+        @staticmethod
+        def dumps(obj: Any, *args: Any, **kwargs: Any) -> str:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
 
-def on_activity_update(data: Dict):
-    """Callback for activity tracker updates"""
-    socketio.emit('activity_update', data, broadcast=True, namespace='/')
-    socketio.emit('update', data, broadcast=True, namespace='/')  # Generic update
+        @staticmethod
+        def loads(s, *args: Any, **kwargs: Any) -> Any:
+            return orjson.loads(s)
+
+    _socketio_json = {'json': _OrjsonSocketIOAdapter}
+except ImportError:  # orjson is optional; Flask and SocketIO fall back to stdlib json
+    OrjsonProvider = None
+    _socketio_json = {}
+
+
+app = Flask(__name__, template_folder='templates', static_folder='static')
+app.config['SECRET_KEY'] = 'agent-viewport-secret-key'
+if OrjsonProvider is not None:
+    app.json = OrjsonProvider(app)
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading', **_socketio_json)
+
+# Connection logging is buffered: records are written in batches of 64, at
+# WARNING and above, or whenever the idle heartbeat thread flushes
+logger = logging.getLogger('viewport')
+logger.setLevel(logging.INFO)
+_log_buffer = logging.handlers.MemoryHandler(
+    capacity=64,
+    flushLevel=logging.WARNING,
+    target=logging.StreamHandler(sys.stderr)
+)
+logger.addHandler(_log_buffer)
+
+# Number of connected clients; only the count is ever needed
+client_count = 0
+_client_count_lock = threading.Lock()
+
+# Dashboard clients get every event; subscribe_agent moves a client to its
+# agent's room so it only receives that agent's events
+ALL_ROOM = 'all'
+
+
+def agent_room(agent_name: str) -> str:
+    """SocketIO room name for one agent's subscribers"""
+    return f'agent:{agent_name}'
+
+
+def emit_activity_batches():
+    """Emit queued tracker updates as one activity_batch frame per room per tick"""
+    while True:
+        batch = tracker.drain_updates(timeout=0.05)
+        if not batch or not client_count:
+            continue
+        socketio.emit('activity_batch', batch, to=ALL_ROOM, namespace='/')
+        
+        by_agent: Dict[str, list] = {}
+        for event in batch:
+            agent_name = event.get('activity', {}).get('agent_name') or event.get('agent_name')
+            if agent_name:
+                by_agent.setdefault(agent_name, []).append(event)
+        for agent_name, events in by_agent.items():
+            socketio.emit('activity_batch', events, to=agent_room(agent_name), namespace='/')
 
 
 @app.route('/')
@@ -36,7 +103,7 @@ def index():
 @app.route('/api/dashboard')
 def get_dashboard():
     """Get current dashboard data"""
-    return jsonify(tracker.get_dashboard_data())
+    return Response(tracker.get_dashboard_json(), mimetype='application/json')
 
 
 @app.route('/api/agents')
@@ -85,41 +152,25 @@ def get_history():
     except:
         pass
     
-    return jsonify(tracker.get_activity_history(limit=limit))
+    return Response(tracker.get_activity_history_json(limit=limit),
+                    mimetype='application/json')
 
 
 @app.route('/api/stats')
 def get_stats():
     """Get overall statistics"""
-    statuses = tracker.get_all_agent_statuses()
-    activities = tracker.get_all_activities()
-    
-    total_operations = sum(s.get('total_operations', 0) for s in statuses)
-    successful_operations = sum(s.get('successful_operations', 0) for s in statuses)
-    failed_operations = sum(s.get('failed_operations', 0) for s in statuses)
-    
-    active_agents = sum(1 for s in statuses if s.get('is_active', False))
-    active_activities = len([a for a in activities if a.get('status') not in ['success', 'error', 'cancelled']])
-    
-    return jsonify({
-        "total_agents": len(statuses),
-        "active_agents": active_agents,
-        "total_operations": total_operations,
-        "successful_operations": successful_operations,
-        "failed_operations": failed_operations,
-        "active_activities": active_activities,
-        "success_rate": (
-            successful_operations / total_operations * 100
-            if total_operations > 0 else 0
-        )
-    })
+    return jsonify(tracker.get_stats())
 
 
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
-    connected_clients.add(request.sid)
-    print(f"Client connected: {request.sid}. Total clients: {len(connected_clients)}", file=sys.stderr, flush=True)
+    global client_count
+    with _client_count_lock:
+        client_count += 1
+        total = client_count
+    join_room(ALL_ROOM)
+    logger.info("Client connected: %s. Total clients: %d", request.sid, total)
     
     # Send current state to new client
     emit('dashboard_data', tracker.get_dashboard_data())
@@ -129,8 +180,11 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
-    connected_clients.discard(request.sid)
-    print(f"Client disconnected: {request.sid}. Total clients: {len(connected_clients)}", file=sys.stderr, flush=True)
+    global client_count
+    with _client_count_lock:
+        client_count -= 1
+        total = client_count
+    logger.info("Client disconnected: %s. Total clients: %d", request.sid, total)
 
 
 @socketio.on('request_update')
@@ -144,26 +198,41 @@ def handle_subscribe_agent(data):
     """Subscribe to updates for a specific agent"""
     agent_name = data.get('agent_name')
     if agent_name:
+        leave_room(ALL_ROOM)
+        join_room(agent_room(agent_name))
         emit('agent_data', {
             'status': tracker.get_agent_status(agent_name),
             'activities': tracker.get_agent_activities(agent_name)
         })
 
 
+@socketio.on('unsubscribe_agent')
+def handle_unsubscribe_agent(data):
+    """Stop receiving a specific agent's updates and rejoin the dashboard feed"""
+    agent_name = data.get('agent_name')
+    if agent_name:
+        leave_room(agent_room(agent_name))
+    join_room(ALL_ROOM)
+
+
 def start_viewport_server(host='localhost', port=5000, debug=False):
     """Start the viewport web server"""
-    # Subscribe to activity tracker updates
-    tracker.subscribe(on_activity_update)
+    # Forward activity tracker updates in coalesced batches
+    batch_thread = threading.Thread(target=emit_activity_batches, daemon=True)
+    batch_thread.start()
     
-    # Start background thread for periodic updates
+    # Start background thread for heartbeats; activity_batch frames already
+    # keep clients current while the tracker is busy, so only beat when idle
     def periodic_updates():
         while True:
-            time.sleep(5)  # Send periodic updates every 5 seconds
-            if connected_clients:
+            changed = tracker.wait_for_change(timeout=5.0)
+            if not changed:
+                _log_buffer.flush()
+            if not changed and client_count:
                 socketio.emit('heartbeat', {
                     'timestamp': time.time(),
-                    'connected_clients': len(connected_clients)
-                }, broadcast=True, namespace='/')
+                    'connected_clients': client_count
+                }, namespace='/')
     
     update_thread = threading.Thread(target=periodic_updates, daemon=True)
     update_thread.start()
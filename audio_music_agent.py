@@ -5,11 +5,87 @@ Audio/Music Agent - Генерира музика и аудио за Blender в
 """
 
 import requests
+import atexit
+import functools
 import json
+import os
+import re
+import threading
 import time
+from datetime import datetime
 from typing import Dict, Optional, List
 from pathlib import Path
 
+try:
+    import orjson
+
+    def _dump_library(library: List[Dict]) -> bytes:
+        return orjson.dumps(library, option=orjson.OPT_INDENT_2)
+except ImportError:  # orjson is optional; the stdlib codec produces the same data
+    def _dump_library(library: List[Dict]) -> bytes:
+        return json.dumps(library, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+# Scene keywords per music style, in priority order. Every group sits inside
+# a lookahead so one finditer pass sees each keyword at every position.
+_STYLE_RE = re.compile(
+    r'(?=(?P<dramatic>explosion|action|dramatic|intense)'
+    r'|(?P<calm>calm|peaceful|serene|ocean|bedroom)'
+    r'|(?P<tech>modern|futuristic|tech|ai)'
+    r'|(?P<transform>transformation|before|after|reveal))',
+    re.IGNORECASE
+)
+_STYLE_PRIORITY = ("dramatic", "calm", "tech", "transform")
+
+_STYLE_TABLE = {
+    "dramatic": "dramatic cinematic music, intense, epic, 30 seconds",
+    "calm": "ambient atmospheric music, calm, peaceful, 60 seconds",
+    "tech": "electronic tech music, modern, futuristic, 30 seconds",
+    "transform": "upbeat electronic music, energetic, build-up to drop, 30 seconds",
+    "default": "cinematic background music, versatile, 45 seconds",
+}
+
+# Base prompts per video type; "{duration}" is filled in by create_music_prompt
+_MUSIC_PROMPTS = {
+    "before_after": "Upbeat electronic music, energetic, modern, {duration} seconds, TikTok style, build-up to satisfying drop",
+    "tutorial": "Clean professional music, not distracting, educational vibe, {duration} seconds, background-friendly",
+    "time_lapse": "Ambient atmospheric music, smooth, flowing, {duration} seconds, background-friendly, calming",
+    "behind_scenes": "Tech electronic music, futuristic, modern, {duration} seconds, AI-themed, energetic",
+    "transformation": "Inspirational cinematic music, uplifting, progressive, {duration} seconds, positive vibes",
+    "cinematic": "Cinematic orchestral music, dramatic, emotional, {duration} seconds, high quality",
+    "funny": "Playful upbeat music, fun, lighthearted, {duration} seconds, TikTok style",
+    "dramatic": "Dramatic cinematic music, intense, epic, {duration} seconds, high quality"
+}
+
+# Music recommendations per scene type, each pre-wrapped in its result list.
+# The returned lists are shared: treat them as read-only.
+_RECS = {
+    "bedroom": [{
+        "style": "ambient atmospheric music, calm, peaceful",
+        "generators": ["Suno AI", "Udio", "Mubert"],
+        "duration": 60,
+        "mood": "serene, relaxing"
+    }],
+    "explosion": [{
+        "style": "dramatic cinematic music, intense, epic",
+        "generators": ["Suno AI", "AIVA"],
+        "duration": 30,
+        "mood": "intense, dramatic"
+    }],
+    "tutorial": [{
+        "style": "clean professional music, background-friendly",
+        "generators": ["Mubert", "Stable Audio"],
+        "duration": 60,
+        "mood": "professional, educational"
+    }]
+}
+_DEFAULT_REC = [{
+    "style": "versatile cinematic music",
+    "generators": ["Suno AI"],
+    "duration": 45,
+    "mood": "neutral"
+}]
+
 
 class AudioMusicAgent:
     """Agent за генериране на музика и аудио"""
@@ -19,6 +95,47 @@ class AudioMusicAgent:
         self.music_library = Path("music_library")
         self.music_library.mkdir(exist_ok=True)
         self.generated_tracks = []
+        
+        # Библиотеката се държи в паметта и се записва на диска отложено
+        self._library_file = self.music_library / "music_library.json"
+        if self._library_file.exists():
+            with open(self._library_file, 'r', encoding='utf-8') as f:
+                self._library: List[Dict] = json.load(f)
+        else:
+            self._library = []
+        self._library_lock = threading.Lock()
+        # Сериализира записите на диска (фонова нишка и atexit)
+        self._write_lock = threading.Lock()
+        self._dirty_count = 0
+        self._flush_event = threading.Event()
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+        atexit.register(self.flush)
+    
+    def _flush_loop(self):
+        """Записва библиотеката на всеки 2 s или след 50 нови записа"""
+        while True:
+            self._flush_event.wait(timeout=2.0)
+            self._flush_event.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Записите остават чакащи и се опитват отново при следващия цикъл
+                print(f"Music library flush failed: {e}")
+    
+    def flush(self):
+        """Записва чакащите промени атомарно (tmp файл + os.replace)"""
+        with self._write_lock:
+            with self._library_lock:
+                pending = self._dirty_count
+                if not pending:
+                    return
+                data = _dump_library(self._library)
+            tmp_file = self._library_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, self._library_file)
+            with self._library_lock:
+                self._dirty_count -= pending
     
     def generate_music_with_suno(self, prompt: str, duration: int = 30) -> Dict:
         """
@@ -56,19 +173,10 @@ class AudioMusicAgent:
     
     def suggest_music_for_scene(self, scene_description: str) -> Dict:
         """Предлага подходяща музика за сцена"""
-        description_lower = scene_description.lower()
-        
         # Определяне на стил базирано на описание
-        if any(word in description_lower for word in ["explosion", "action", "dramatic", "intense"]):
-            style = "dramatic cinematic music, intense, epic, 30 seconds"
-        elif any(word in description_lower for word in ["calm", "peaceful", "serene", "ocean", "bedroom"]):
-            style = "ambient atmospheric music, calm, peaceful, 60 seconds"
-        elif any(word in description_lower for word in ["modern", "futuristic", "tech", "ai"]):
-            style = "electronic tech music, modern, futuristic, 30 seconds"
-        elif any(word in description_lower for word in ["transformation", "before", "after", "reveal"]):
-            style = "upbeat electronic music, energetic, build-up to drop, 30 seconds"
-        else:
-            style = "cinematic background music, versatile, 45 seconds"
+        found = {m.lastgroup for m in _STYLE_RE.finditer(scene_description)}
+        key = next((k for k in _STYLE_PRIORITY if k in found), "default")
+        style = _STYLE_TABLE[key]
         
         return {
             "status": "success",
@@ -78,51 +186,20 @@ class AudioMusicAgent:
             "duration": 30 if "30 seconds" in style else 60
         }
     
-    def create_music_prompt(self, video_type: str, mood: str, duration: int = 30) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def create_music_prompt(video_type: str, mood: str, duration: int = 30) -> str:
         """Създава оптимизиран prompt за музика"""
-        prompts = {
-            "before_after": f"Upbeat electronic music, energetic, modern, {duration} seconds, TikTok style, build-up to satisfying drop",
-            "tutorial": f"Clean professional music, not distracting, educational vibe, {duration} seconds, background-friendly",
-            "time_lapse": f"Ambient atmospheric music, smooth, flowing, {duration} seconds, background-friendly, calming",
-            "behind_scenes": f"Tech electronic music, futuristic, modern, {duration} seconds, AI-themed, energetic",
-            "transformation": f"Inspirational cinematic music, uplifting, progressive, {duration} seconds, positive vibes",
-            "cinematic": f"Cinematic orchestral music, dramatic, emotional, {duration} seconds, high quality",
-            "funny": f"Playful upbeat music, fun, lighthearted, {duration} seconds, TikTok style",
-            "dramatic": f"Dramatic cinematic music, intense, epic, {duration} seconds, high quality"
-        }
-        
-        base_prompt = prompts.get(video_type, f"{mood} music, {duration} seconds, TikTok style")
+        template = _MUSIC_PROMPTS.get(video_type)
+        if template is None:
+            base_prompt = f"{mood} music, {duration} seconds, TikTok style"
+        else:
+            base_prompt = template.format(duration=duration)
         return f"{base_prompt}, high quality, no vocals (instrumental)"
     
     def get_music_recommendations(self, scene_type: str) -> List[Dict]:
-        """Връща препоръки за музика"""
-        recommendations = {
-            "bedroom": {
-                "style": "ambient atmospheric music, calm, peaceful",
-                "generators": ["Suno AI", "Udio", "Mubert"],
-                "duration": 60,
-                "mood": "serene, relaxing"
-            },
-            "explosion": {
-                "style": "dramatic cinematic music, intense, epic",
-                "generators": ["Suno AI", "AIVA"],
-                "duration": 30,
-                "mood": "intense, dramatic"
-            },
-            "tutorial": {
-                "style": "clean professional music, background-friendly",
-                "generators": ["Mubert", "Stable Audio"],
-                "duration": 60,
-                "mood": "professional, educational"
-            }
-        }
-        
-        return [recommendations.get(scene_type, {
-            "style": "versatile cinematic music",
-            "generators": ["Suno AI"],
-            "duration": 45,
-            "mood": "neutral"
-        })]
+        """Връща препоръки за музика (споделен списък, само за четене)"""
+        return _RECS.get(scene_type, _DEFAULT_REC)
     
     def save_music_info(self, track_name: str, prompt: str, generator: str, file_path: str):
         """Запазва информация за генерираната музика"""
@@ -131,31 +208,30 @@ class AudioMusicAgent:
             "prompt": prompt,
             "generator": generator,
             "file_path": file_path,
-            "created_at": time.strftime("%Y-%m-%d %H:%M:%S")
+            "created_at": time.time()
         }
         
         self.generated_tracks.append(track_info)
         
-        # Запазване в JSON файл
-        library_file = self.music_library / "music_library.json"
-        if library_file.exists():
-            with open(library_file, 'r', encoding='utf-8') as f:
-                library = json.load(f)
-        else:
-            library = []
-        
-        library.append(track_info)
-        
-        with open(library_file, 'w', encoding='utf-8') as f:
-            json.dump(library, f, indent=2, ensure_ascii=False)
+        # Запазване в JSON файл (отложено, от фоновата нишка)
+        with self._library_lock:
+            self._library.append(track_info)
+            self._dirty_count += 1
+            if self._dirty_count >= 50:
+                self._flush_event.set()
     
     def list_generated_tracks(self) -> List[Dict]:
         """Връща списък с генерирани тракове"""
-        library_file = self.music_library / "music_library.json"
-        if library_file.exists():
-            with open(library_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
+        with self._library_lock:
+            return [self._format_track(track) for track in self._library]
+    
+    @staticmethod
+    def _format_track(track: Dict) -> Dict:
+        """Форматира epoch времето на трака като ISO низ (по-старите записи са низове)"""
+        created_at = track.get("created_at")
+        if isinstance(created_at, (int, float)):
+            return {**track, "created_at": datetime.fromtimestamp(created_at).isoformat()}
+        return track
 
 
 def main():
@@ -1,11 +1,195 @@
 # blender_ollama_server.py - FINAL WORKING VERSION
+import hashlib
+import io
 import json
+import re
 import socket
+import sqlite3
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
 import sys
 import time
 
+try:
+    import orjson
+
+    _dumps_bytes = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; the stdlib codec produces the same data
+    def _dumps_bytes(obj):
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it the semantic cache tier is off
+    np = None
+
+SYSTEM_PROMPT = """You are a Blender 3D expert. Generate Python code using bpy module.
+Return ONLY the code without explanations. Make sure the code is complete and runnable.
+
+Example format:
+import bpy
+# Clear scene
+bpy.ops.object.select_all(action='SELECT')
+bpy.ops.object.delete(use_global=False)
+# Create objects
+bpy.ops.mesh.primitive_cube_add(location=(0,0,0))"""
+
+# A ```python block is preferred; otherwise the first fenced block of any
+# language, minus its tag line. An unclosed fence runs to the end.
+_PYTHON_FENCE = re.compile(r"```python[ \t]*\n?(.*?)(?:```|\Z)", re.DOTALL)
+_FENCE = re.compile(r"```(?:[\w+-]*[ \t]*\n)?(.*?)(?:```|\Z)", re.DOTALL)
+
+CACHE_PATH = Path("~/.cache/blender_ollama/cache.sqlite").expanduser()
+
+
+class CodegenCache:
+    """Exact-match prompt -> code cache in SQLite with TTL and LRU eviction"""
+    
+    def __init__(self, path=CACHE_PATH, ttl_seconds=7 * 24 * 3600, max_entries=1000):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), isolation_level=None)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS codegen"
+            "(key TEXT PRIMARY KEY, code TEXT, ts INTEGER, prompt TEXT, scope TEXT)"
+        )
+        # Caches created before prompts were kept lack the last two columns
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(codegen)")}
+        for column in ("prompt", "scope"):
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE codegen ADD COLUMN {column} TEXT")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_codegen_ts ON codegen(ts)")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(model, system_prompt, prompt):
+        """SHA-256 over the canonical JSON of everything that shapes the output"""
+        blob = json.dumps({"m": model, "s": system_prompt, "p": prompt}, sort_keys=True)
+        return hashlib.sha256(blob.encode()).hexdigest()
+    
+    def get(self, key):
+        """Return cached code for key, refreshing its LRU timestamp, or None"""
+        now = int(time.time())
+        row = self.db.execute(
+            "SELECT code FROM codegen WHERE key = ? AND ts >= ?",
+            (key, now - self.ttl_seconds)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute("UPDATE codegen SET ts = ? WHERE key = ?", (now, key))
+        return row[0]
+    
+    def put(self, key, code, prompt=None, scope=None):
+        """Store code for key, then drop expired and least recently used rows
+        
+        prompt and scope let the semantic tier embed the entry later.
+        """
+        now = int(time.time())
+        self.db.execute("BEGIN")
+        try:
+            self.db.execute(
+                "INSERT OR REPLACE INTO codegen(key, code, ts, prompt, scope) VALUES (?, ?, ?, ?, ?)",
+                (key, code, now, prompt, scope)
+            )
+            self.db.execute("DELETE FROM codegen WHERE ts < ?", (now - self.ttl_seconds,))
+            self.db.execute(
+                "DELETE FROM codegen WHERE key IN "
+                "(SELECT key FROM codegen ORDER BY ts DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.db.execute("COMMIT")
+        except Exception:
+            # Never leave the connection inside a transaction (e.g. "database is locked")
+            if self.db.in_transaction:
+                self.db.execute("ROLLBACK")
+            raise
+    
+    def stats(self):
+        """Hit/miss counters for this process"""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class SemanticCache:
+    """Embedding-similarity tier that maps a prompt to a CodegenCache key
+    
+    Unit-normalised prompt embeddings are kept in memory as one matrix per
+    scope (model + system prompt), so a lookup is a single matrix-vector
+    product. The vectors are persisted next to the codegen rows.
+    """
+    
+    def __init__(self, codegen, threshold=0.92):
+        self.codegen = codegen
+        self.threshold = threshold
+        db = codegen.db
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS codegen_embedding"
+            "(key TEXT PRIMARY KEY, scope TEXT, vec BLOB)"
+        )
+        db.execute("DELETE FROM codegen_embedding WHERE key NOT IN (SELECT key FROM codegen)")
+        self._keys = {}
+        self._matrix = {}
+        for key, scope, vec in db.execute("SELECT key, scope, vec FROM codegen_embedding"):
+            self._append(scope, key, np.frombuffer(vec, dtype=np.float32))
+    
+    @staticmethod
+    def make_scope(model, system_prompt):
+        """Only prompts generated under the same model and system prompt may match"""
+        return hashlib.sha256(f"{model}\0{system_prompt}".encode()).hexdigest()[:16]
+    
+    def _append(self, scope, key, unit_vec):
+        matrix = self._matrix.get(scope)
+        self._matrix[scope] = unit_vec[None, :] if matrix is None else np.vstack((matrix, unit_vec))
+        self._keys.setdefault(scope, []).append(key)
+    
+    @staticmethod
+    def _normalise(vec):
+        vec = np.asarray(vec, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+    
+    def lookup(self, scope, vec):
+        """Return the key of the most similar cached prompt above threshold"""
+        matrix = self._matrix.get(scope)
+        if matrix is None:
+            return None
+        scores = matrix @ self._normalise(vec)
+        best = int(scores.argmax())
+        return self._keys[scope][best] if scores[best] >= self.threshold else None
+    
+    def missing(self, scope):
+        """(key, prompt) of cached entries in scope that have no embedding yet"""
+        return self.codegen.db.execute(
+            "SELECT key, prompt FROM codegen WHERE scope = ? AND prompt IS NOT NULL "
+            "AND key NOT IN (SELECT key FROM codegen_embedding)",
+            (scope,)
+        ).fetchall()
+    
+    def add(self, scope, key, vec):
+        """Remember the embedding of the prompt stored under key"""
+        unit_vec = self._normalise(vec)
+        self.codegen.db.execute(
+            "INSERT OR REPLACE INTO codegen_embedding(key, scope, vec) VALUES (?, ?, ?)",
+            (key, scope, unit_vec.tobytes())
+        )
+        self._append(scope, key, unit_vec)
+
+
 class BlenderOllamaBridge:
+    # Seconds without any answer before the next fallback model is raced in
+    HEDGE_DELAY = 30.0
+    # Seconds allowed to (re)connect to Blender, and to wait for a reply
+    CONNECT_TIMEOUT = 2.0
+    REPLY_TIMEOUT = 30.0
+    
     def __init__(self):
         self.ollama_url = "http://localhost:11434"
         self.blender_host = "localhost"
@@ -13,6 +197,31 @@ class BlenderOllamaBridge:
         # Try alternative models if llama3.2 hits daily limit
         self.model = "gemma3:4b"  # Local model, no daily limits
         self.fallback_models = ["deepseek-r1:8b", "llama3.2:latest"]
+        # One pooled keep-alive session for every Ollama call; no adapter
+        # retries because ask_ollama already falls back across models
+        self.http = requests.Session()
+        self.http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0))
+        self.http.headers.update({
+            "Connection": "keep-alive",
+            "Accept-Encoding": "gzip, deflate",
+            "Content-Type": "application/json",
+        })
+        self._executor = ThreadPoolExecutor(
+            max_workers=1 + len(self.fallback_models), thread_name_prefix="ollama"
+        )
+        self._cache = CodegenCache()
+        # Reused receive buffer for Blender replies; grows if a reply outgrows it
+        self._recv_buf = bytearray(1 << 20)
+        self.socket = None
+        self.embed_model = "nomic-embed-text"
+        self._semantic = SemanticCache(self._cache) if np is not None else None
+        # Optional Ollama num_thread for embedding requests; None keeps its default
+        self.embed_num_thread = None
+    
+    def _post_json(self, path, payload, read_timeout):
+        """POST a payload encoded by the fast codec; connecting may take at most 5s"""
+        return self.http.post(f"{self.ollama_url}{path}", data=_dumps_bytes(payload),
+                              timeout=(5, read_timeout))
     
     def log(self, message):
         """Print debug messages"""
@@ -21,86 +230,238 @@ class BlenderOllamaBridge:
     
     def connect_to_blender(self):
         """Connect to Blender socket server"""
+        self._close_socket()
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(30)
-            self.socket.connect((self.blender_host, self.blender_port))
+            self.socket = socket.create_connection(
+                (self.blender_host, self.blender_port), timeout=self.CONNECT_TIMEOUT
+            )
+            self.socket.settimeout(self.REPLY_TIMEOUT)
             self.log("✅ Connected to Blender")
             return True
         except Exception as e:
+            self.socket = None
             self.log(f"❌ Blender connection failed: {e}")
             return False
     
+    def _close_socket(self):
+        """Drop the Blender socket, if any"""
+        if self.socket is not None:
+            try:
+                self.socket.close()
+            except OSError:
+                pass
+            self.socket = None
+    
+    def _socket_alive(self):
+        """Non-blocking MSG_PEEK probe for a half-open or desynced Blender socket"""
+        try:
+            self.socket.setblocking(False)
+            # b"" means Blender closed the connection; unread bytes mean a
+            # stale reply that would be mistaken for the next answer
+            self.socket.recv(1, socket.MSG_PEEK)
+            return False
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        finally:
+            self.socket.settimeout(self.REPLY_TIMEOUT)
+    
+    def embed_batch(self, texts):
+        """Embed many texts in one /api/embed request; returns a float32 matrix"""
+        payload = {"model": self.embed_model, "input": list(texts)}
+        if self.embed_num_thread:
+            payload["options"] = {"num_thread": self.embed_num_thread}
+        response = self._post_json("/api/embed", payload, 60)
+        response.raise_for_status()
+        return np.asarray(response.json()["embeddings"], dtype=np.float32)
+    
+    def _embed(self, text):
+        """Embed text with the local Ollama embedding model"""
+        return self.embed_batch([text])[0]
+    
+    def warm_semantic_cache(self, batch_size=64):
+        """Embed cached prompts that have no vector yet, batch_size per request"""
+        if self._semantic is None:
+            return
+        scope = SemanticCache.make_scope(self.model, SYSTEM_PROMPT)
+        rows = self._semantic.missing(scope)
+        try:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                vectors = self.embed_batch([prompt for _, prompt in batch])
+                for (key, _), vec in zip(batch, vectors):
+                    self._semantic.add(scope, key, vec)
+        except Exception as e:
+            self.log(f"⚠️ Semantic cache disabled: {e}")
+            self._semantic = None
+            return
+        if rows:
+            self.log(f"🧠 Embedded {len(rows)} cached prompts")
+    
+    def _semantic_lookup(self, scope, prompt):
+        """Return (cached code or None, prompt embedding or None)"""
+        try:
+            vec = self._embed(prompt)
+        except Exception as e:
+            # Usually the embedding model is not pulled; stop asking this session
+            self.log(f"⚠️ Semantic cache disabled: {e}")
+            self._semantic = None
+            return None, None
+        key = self._semantic.lookup(scope, vec)
+        code = self._cache_get(key) if key else None
+        if code is not None:
+            self.log(f"semantic cache hit {key[:8]}")
+        return code, vec
+    
+    def _cache_get(self, key):
+        """Exact cache lookup that treats database errors as a miss"""
+        try:
+            return self._cache.get(key)
+        except sqlite3.Error as e:
+            self.log(f"⚠️ Cache read failed: {e}")
+            return None
+    
+    def _generate(self, model, prompt, system_prompt):
+        """Generate code with one model; raises on any failure"""
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "system": system_prompt,
+            "stream": False,
+            "options": {
+                "temperature": 0.7,
+                "num_predict": 1000
+            }
+        }
+        
+        self.log(f"🤖 Trying {model} to generate code...")
+        response = self._post_json("/api/generate", payload, 120)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        
+        result = response.json().get("response", "")
+        self.log(f"✅ Code generated successfully with {model}")
+        
+        # Extract code from response
+        match = _PYTHON_FENCE.search(result) or _FENCE.search(result)
+        return (match.group(1) if match else result).strip()
+    
     def ask_ollama(self, prompt):
-        """Ask Ollama to generate Blender code, trying multiple models if needed"""
-        system_prompt = """You are a Blender 3D expert. Generate Python code using bpy module.
-Return ONLY the code without explanations. Make sure the code is complete and runnable.
-
-Example format:
-import bpy
-# Clear scene
-bpy.ops.object.select_all(action='SELECT')
-bpy.ops.object.delete(use_global=False)
-# Create objects
-bpy.ops.mesh.primitive_cube_add(location=(0,0,0))"""
+        """Ask Ollama to generate Blender code, trying multiple models if needed
+        
+        The primary model starts alone. A fallback starts as soon as a running
+        model fails, or as a hedge when nothing has answered for HEDGE_DELAY
+        seconds. The first successful response wins.
+        """
+        system_prompt = SYSTEM_PROMPT
+        
+        cache_key = self._cache.make_key(self.model, system_prompt, prompt)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            self.log(f"cache hit {cache_key[:8]}")
+            return cached
+        
+        scope = SemanticCache.make_scope(self.model, system_prompt)
+        query_vec = None
+        if self._semantic is not None:
+            cached, query_vec = self._semantic_lookup(scope, prompt)
+            if cached is not None:
+                return cached
         
         # Try primary model first, then fallbacks
         models_to_try = [self.model] + self.fallback_models
+        waiting = list(reversed(models_to_try))
+        running = {}
+        last_error = None
         
-        for model in models_to_try:
-            payload = {
-                "model": model,
-                "prompt": prompt,
-                "system": system_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "num_predict": 1000
-                }
-            }
+        def launch():
+            if waiting:
+                model = waiting.pop()
+                running[self._executor.submit(self._generate, model, prompt, system_prompt)] = model
+        
+        launch()
+        while running:
+            timeout = self.HEDGE_DELAY if waiting else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                self.log(f"⏳ No answer after {self.HEDGE_DELAY:.0f}s, hedging with next model...")
+                launch()
+                continue
             
-            try:
-                self.log(f"🤖 Trying {model} to generate code...")
-                response = requests.post(f"{self.ollama_url}/api/generate", 
-                                       json=payload, timeout=120)
-                
-                if response.status_code == 200:
-                    result = response.json().get("response", "")
-                    self.log(f"✅ Code generated successfully with {model}")
-                    
-                    # Extract code from response
-                    if "```python" in result:
-                        result = result.split("```python")[1].split("```")[0]
-                    elif "```" in result:
-                        result = result.split("```")[1].split("```")[0]
-                    
-                    return result.strip()
+            for future in done:
+                model = running.pop(future)
+                try:
+                    code = future.result()
+                except requests.exceptions.Timeout as e:
+                    last_error = e
+                    self.log(f"⚠️ {model} timed out, trying next model...")
+                except Exception as e:
+                    last_error = e
+                    self.log(f"⚠️ {model} error: {str(e)}, trying next model...")
                 else:
-                    self.log(f"⚠️ {model} returned HTTP {response.status_code}, trying next model...")
-                    continue
-                    
-            except requests.exceptions.Timeout:
-                self.log(f"⚠️ {model} timed out, trying next model...")
-                continue
-            except Exception as e:
-                self.log(f"⚠️ {model} error: {str(e)}, trying next model...")
-                continue
+                    # Abandon the slower models; queued ones never start
+                    for other in running:
+                        other.cancel()
+                    if code:
+                        try:
+                            self._cache.put(cache_key, code, prompt, scope)
+                            if query_vec is not None and self._semantic is not None:
+                                self._semantic.add(scope, cache_key, query_vec)
+                        except sqlite3.Error as e:
+                            # The answer is still good; only caching it failed
+                            self.log(f"⚠️ Cache write failed: {e}")
+                    return code
+                launch()
         
-        return f"Error: All models failed. Last error: {str(e) if 'e' in locals() else 'Unknown'}"
+        return f"Error: All models failed. Last error: {str(last_error) if last_error else 'Unknown'}"
     
     def send_to_blender(self, command):
         """Send command to Blender"""
-        if not hasattr(self, 'socket') or not self.socket:
+        if self.socket is None or not self._socket_alive():
             if not self.connect_to_blender():
                 return {"status": "error", "message": "Blender not connected"}
         
+        payload = json.dumps(command).encode()
         try:
-            self.socket.send(json.dumps(command).encode())
-            response_data = self.socket.recv(65536)
-            return json.loads(response_data.decode())
+            try:
+                self.socket.sendall(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                # Blender restarted between the probe and the send; retry once
+                if not self.connect_to_blender():
+                    return {"status": "error", "message": "Blender not connected"}
+                self.socket.sendall(payload)
+            return self._recv_json()
         except Exception as e:
+            # The stream is in an unknown state; reconnect on the next call
+            self._close_socket()
             return {"status": "error", "message": str(e)}
     
+    def _recv_json(self):
+        """Read one JSON reply of any size into the reusable receive buffer
+        
+        Blender's socket server sends a bare JSON document with no length
+        prefix, so keep reading until the bytes so far decode completely.
+        """
+        view = memoryview(self._recv_buf)
+        length = 0
+        while True:
+            if length == len(self._recv_buf):
+                view.release()
+                self._recv_buf.extend(bytes(len(self._recv_buf)))
+                view = memoryview(self._recv_buf)
+            n = self.socket.recv_into(view[length:])
+            if n == 0:
+                raise ConnectionError("Blender closed the connection mid-response")
+            length += n
+            # A complete document ends with a closing bracket (maybe whitespace)
+            if self._recv_buf[length - 1] not in b"}] \r\n\t":
+                continue
+            try:
+                return json.loads(view[:length].tobytes())
+            except json.JSONDecodeError:
+                continue
+    
     def create_scene(self, description):
         """Main function: create scene from description"""
         self.log(f"🎨 Creating scene: {description}")
@@ -128,21 +489,56 @@ bpy.ops.mesh.primitive_cube_add(location=(0,0,0))"""
         """Get current scene information"""
         return self.send_to_blender({"type": "get_scene_info"})
 
+# Available MCP tools; static, so the "tools" reply is serialized only once
+_TOOLS = [
+    {
+        "name": "create_scene",
+        "description": "Create a 3D scene from text description",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "description": {
+                    "type": "string", 
+                    "description": "Description of the scene to create"
+                }
+            },
+            "required": ["description"]
+        }
+    },
+    {
+        "name": "get_scene_info",
+        "description": "Get information about the current Blender scene", 
+        "parameters": {
+            "type": "object",
+            "properties": {}
+        }
+    }
+]
+_TOOLS_RESPONSE = _dumps_bytes({"result": _TOOLS, "error": None}) + b"\n"
+
+def _write_response(out, response):
+    """Write one newline-terminated JSON response to the binary stdout"""
+    out.write(_dumps_bytes(response) + b"\n")
+    out.flush()
+
 def main():
     bridge = BlenderOllamaBridge()
     bridge.log("🚀 Blender+Ollama MCP Server Started")
+    bridge.warm_semantic_cache()
     bridge.log("📡 Waiting for commands from Cursor...")
     
-    # Simple MCP protocol implementation
+    # Simple MCP protocol implementation, on the binary stdin/stdout streams
+    reader = io.BufferedReader(sys.stdin.buffer.raw, buffer_size=65536)
+    out = sys.stdout.buffer
     try:
-        while True:
-            # Read from stdin (Cursor sends commands here)
-            line = sys.stdin.readline().strip()
+        # Read from stdin (Cursor sends commands here)
+        for raw in reader:
+            line = raw.strip()
             if not line:
                 break
             
             try:
-                data = json.loads(line)
+                data = _loads(line)
                 method = data.get("method")
                 params = data.get("params", {})
                 
@@ -156,47 +552,23 @@ def main():
                     response = {"result": result, "error": None}
                     
                 elif method == "tools":
-                    # Return available tools
-                    tools = [
-                        {
-                            "name": "create_scene",
-                            "description": "Create a 3D scene from text description",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {
-                                    "description": {
-                                        "type": "string", 
-                                        "description": "Description of the scene to create"
-                                    }
-                                },
-                                "required": ["description"]
-                            }
-                        },
-                        {
-                            "name": "get_scene_info",
-                            "description": "Get information about the current Blender scene", 
-                            "parameters": {
-                                "type": "object",
-                                "properties": {}
-                            }
-                        }
-                    ]
-                    response = {"result": tools, "error": None}
+                    # Return available tools (serialized once at import)
+                    out.write(_TOOLS_RESPONSE)
+                    out.flush()
+                    continue
                     
                 else:
                     response = {"result": None, "error": f"Unknown method: {method}"}
                 
                 # Send response back to Cursor
-                print(json.dumps(response))
-                sys.stdout.flush()
+                _write_response(out, response)
                 
             except json.JSONDecodeError:
                 # Ignore invalid JSON
                 pass
             except Exception as e:
                 error_response = {"result": None, "error": str(e)}
-                print(json.dumps(error_response))
-                sys.stdout.flush()
+                _write_response(out, error_response)
                 
     except KeyboardInterrupt:
         bridge.log("Server stopped by user")
@@ -5,18 +5,94 @@ Works alongside other agents to assist and enhance their work
 """
 
 from specialized_agents import BaseBlenderSpecialist, OperationRecord
+from data_collector import BlenderDataCollector
 from typing import Dict, List, Optional
 from datetime import datetime
+import atexit
 import json
+import queue
+import re
+import threading
 import time
 
+# Agents a colleague can assist, as (lowercase keyword, agent name) in priority order
+_AGENT_NAMES = tuple(
+    (name.lower(), name)
+    for name in ("Modeling", "Shading", "Animation", "Rendering", "Camera", "VFX")
+)
+_ASSIST_RE = re.compile(r"assist|help")
+
+# Precompiled intent keywords -> handler(agent, description), checked in order
+_INTENT_HANDLERS = (
+    (re.compile(r"refine|polish|quality"), lambda agent, description: agent.refine_scene(description)),
+    (re.compile(r"check"), lambda agent, description: agent.quality_check()),
+)
+
 class ColleagueAgent(BaseBlenderSpecialist):
     """Colleague Agent - Assists and collaborates with other agents"""
     
+    # Seconds a scene snapshot may be reused by back-to-back operations
+    SCENE_INFO_TTL = 0.5
+    
     def __init__(self, **kwargs):
         super().__init__("Colleague", **kwargs)
         self.collaboration_history = []
         self.assistance_tasks = []
+        self._scene_info_cache = (0.0, None)
+        # Operation records are written off the request path
+        self._record_q = queue.Queue()
+        self._record_thread = threading.Thread(target=self._record_worker, daemon=True)
+        self._record_thread.start()
+        atexit.register(self.close)
+    
+    def _record_worker(self):
+        """Write queued OperationRecords with a collector owned by this thread"""
+        # sqlite3 connections are bound to their creating thread
+        collector = BlenderDataCollector(self.collector.db_path)
+        try:
+            while True:
+                record = self._record_q.get()
+                try:
+                    if record is None:
+                        return
+                    collector.record_operation(record)
+                except Exception as e:
+                    self.log(f"Failed to record operation {record.id}: {e}", "ERROR")
+                finally:
+                    self._record_q.task_done()
+        finally:
+            collector.close()
+    
+    def close(self):
+        """Write any queued operation records and stop the record worker"""
+        if not self._record_thread.is_alive():
+            return
+        # The sentinel is queued behind pending records, so they are drained first
+        self._record_q.put(None)
+        self._record_q.join()
+        self._record_thread.join()
+    
+    def cleanup(self):
+        """Clean up resources"""
+        self.close()
+        super().cleanup()
+    
+    def get_scene_info(self) -> Dict:
+        """Get current scene state, reusing a snapshot younger than SCENE_INFO_TTL"""
+        now = time.monotonic()
+        cached_at, cached = self._scene_info_cache
+        if cached is not None and now - cached_at < self.SCENE_INFO_TTL:
+            return cached
+        
+        scene_info = super().get_scene_info()
+        if "error" not in scene_info:
+            self._scene_info_cache = (now, scene_info)
+        return scene_info
+    
+    def execute_code(self, code: str) -> Dict:
+        """Execute code in Blender; the cached scene snapshot is stale afterwards"""
+        self._scene_info_cache = (0.0, None)
+        return super().execute_code(code)
     
     def get_system_prompt(self) -> str:
         return """You are a Colleague Agent - a collaborative assistant that works alongside other specialist agents.
@@ -151,29 +227,32 @@ Generate Python code for scene refinement."""
         # Determine if this is assistance or refinement
         description_lower = description.lower()
         
-        if "assist" in description_lower or "help" in description_lower:
+        if _ASSIST_RE.search(description_lower):
             # Assist another agent
             # Extract agent name from description
-            for agent_name in ["Modeling", "Shading", "Animation", "Rendering", "Camera", "VFX"]:
-                if agent_name.lower() in description_lower:
-                    return self.assist_agent(agent_name, description)
+            agent_name = next((name for keyword, name in _AGENT_NAMES
+                               if keyword in description_lower), None)
+            if agent_name:
+                return self.assist_agent(agent_name, description)
         
-        if "refine" in description_lower or "polish" in description_lower or "quality" in description_lower:
-            return self.refine_scene(description)
-        
-        if "quality check" in description_lower or "check" in description_lower:
-            return self.quality_check()
+        # Refinement or quality check
+        for pattern, handler in _INTENT_HANDLERS:
+            if pattern.search(description_lower):
+                return handler(self, description)
         
         # Default: general assistance
         code = self.generate_code(description)
         if not code:
             return {"status": "error", "message": "Failed to generate code"}
         
+        scene_before = self.get_scene_info()
         result = self.execute_code(code)
         
-        # Record operation
-        scene_before = self.get_scene_info()
-        scene_after = self.get_scene_info()
+        # Record operation; a failed execution left the scene as it was
+        if result.get("status") == "success":
+            scene_after = self.get_scene_info()
+        else:
+            scene_after = scene_before
         
         record = OperationRecord(
             id=f"colleague_{int(time.time())}",
@@ -187,7 +266,7 @@ Generate Python code for scene refinement."""
             execution_time=0.0,
             success=result.get("status") == "success"
         )
-        self.collector.record_operation(record)
+        self._record_q.put_nowait(record)
         
         return result
 